@@ -0,0 +1,55 @@
+import argparse
+import logging
+
+from src.config.settings import Settings
+from src.components.database.neo4j_client import Neo4jClient
+from src.components.rag.embeddings import Embedding
+from src.components.rag.indexing import IndexingService
+
+settings = Settings()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compute and store embeddings for papers that lack one')
+    parser.add_argument('--index-name', type=str, default='paper_vector_index',
+                        help='Vector index to create if missing')
+    parser.add_argument('--batch-size', type=int, default=512,
+                        help='Abstracts per embedding request')
+    parser.add_argument('--page-size', type=int, default=5000,
+                        help='Papers read from Neo4j per page')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Embedding requests in flight at once')
+    parser.add_argument('--tokens-per-minute', type=int, default=1_000_000,
+                        help='Token rate limit for the embedding API')
+    parser.add_argument('--requests-per-minute', type=int, default=3000,
+                        help='Request rate limit for the embedding API')
+    parser.add_argument('--after-id', type=str, default='',
+                        help='Only consider papers with an id greater than this')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    db_client = Neo4jClient(uri=settings.neo4j_uri, user=settings.neo4j_user, password=settings.neo4j_password)
+    try:
+        indexing = IndexingService(
+            db_client=db_client,
+            embedding_service=Embedding(api_key=settings.openai_api_key, cache_dir=settings.embedding_cache_dir),
+            batch_size=args.batch_size
+        )
+        indexing.ensure_vector_index(args.index_name)
+        summary = indexing.backfill_embeddings(
+            page_size=args.page_size,
+            max_concurrency=args.concurrency,
+            tokens_per_minute=args.tokens_per_minute,
+            requests_per_minute=args.requests_per_minute,
+            after_id=args.after_id
+        )
+        print(f"Embedded {summary['embedded']} papers in {summary['seconds']:.1f}s "
+              f"({summary['embeddings_per_sec']:.1f} embeddings/sec, {summary['tokens_per_sec']:.0f} tokens/sec); "
+              f"{summary['failed_batches']} batches failed and will be retried on the next run")
+    finally:
+        db_client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+import argparse
+import json
+import multiprocessing
+import os
+import pickle
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from scripts.preprocess import preprocess_parallel, preprocess_stream
+from scripts.process_stats import git_commit, peak_rss_mb
+from src.components.database.ingest import (
+    ingest_data_parallel,
+    ingest_record_files_parallel,
+    iter_papers,
+    list_record_files
+)
+
+WORDS = (
+    "graph neural network transformer attention retrieval augmented generation language model "
+    "quantum field theory lattice gauge symmetry boson spectral convex optimization stochastic "
+    "gradient descent reinforcement learning policy robot vision segmentation diffusion"
+).split()
+CATEGORIES = [f"{area}.{sub}" for area in ("cs", "math", "physics", "stat", "q-bio") for sub in "ABCDEFGHIJ"]
+
+
+def generate_corpus(path: str, num_papers: int, num_authors: int = 50000, seed: int = 0) -> int:
+    """
+    Write a synthetic raw arXiv snapshot in JSON Lines format.
+
+    Author popularity is heavily skewed, like the real corpus, so a few
+    names appear on many papers and contend for the same nodes.
+    """
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(num_papers):
+            # Most papers have a handful of authors, a few have hundreds
+            author_count = min(int(rng.paretovariate(1.5)) + 1, 300)
+            authors = [
+                [f"Author{int(rng.paretovariate(1.1)) % num_authors}", f"F{rng.randint(0, 25)}", ""]
+                for _ in range(author_count)
+            ]
+            record = {
+                "id": f"{704 + i // 10000:04d}.{i % 10000:04d}",
+                "title": " ".join(rng.choices(WORDS, k=8)),
+                "abstract": " ".join(rng.choices(WORDS, k=150)),
+                "categories": " ".join(rng.sample(CATEGORIES, rng.randint(1, 3))),
+                "authors_parsed": authors,
+                "versions": [{"version": "v1", "created": "Mon, 2 Apr 2007 19:18:42 GMT"}],
+                "update_date": "2008-11-26",
+            }
+            f.write(json.dumps(record) + "\n")
+    return num_papers
+
+
+class FakeTransaction:
+    def __init__(self, driver: 'FakeDriver'):
+        self.driver = driver
+
+    def run(self, query: str, **params):
+        rows = 0
+        for value in params.values():
+            if isinstance(value, list):
+                for item in value:
+                    rows += 1
+                    if isinstance(item, dict):
+                        rows += len(item.get("authors", ())) + len(item.get("categories", ()))
+        self.driver.queries[" ".join(query.split())] += 1
+        self.driver.rows += rows
+        time.sleep(self.driver.base_latency + self.driver.row_latency * rows)
+
+
+class FakeSession:
+    def __init__(self, driver: 'FakeDriver'):
+        self.driver = driver
+
+    def run(self, query: str, **params):
+        FakeTransaction(self.driver).run(query, **params)
+
+    def execute_write(self, func, *args, **kwargs):
+        return func(FakeTransaction(self.driver), *args, **kwargs)
+
+    def close(self):
+        pass
+
+    def __enter__(self) -> 'FakeSession':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class FakeDriver:
+    """
+    In-process Neo4j stand-in that records queries and sleeps to simulate commit cost.
+
+    With a `stats_dir`, `close` writes the recorded query and row counts to a
+    JSON file there, since the driver lives in a pool worker process.
+    """
+
+    def __init__(self, base_latency: float, row_latency: float, stats_dir: Optional[str] = None):
+        self.base_latency = base_latency
+        self.row_latency = row_latency
+        self.stats_dir = stats_dir
+        self.queries = Counter()
+        self.rows = 0
+
+    def session(self, **kwargs) -> FakeSession:
+        return FakeSession(self)
+
+    def close(self):
+        if self.stats_dir is None:
+            return
+        path = os.path.join(self.stats_dir, f"driver-{os.getpid()}-{id(self)}.json")
+        with open(path, 'w') as f:
+            json.dump({"queries": dict(self.queries), "rows": self.rows}, f)
+
+
+class FakeDriverFactory:
+    """Picklable stand-in for `GraphDatabase.driver`, so pool workers can build fake drivers."""
+
+    def __init__(self, base_latency: float = 0.002, row_latency: float = 0.00002, stats_dir: Optional[str] = None):
+        self.base_latency = base_latency
+        self.row_latency = row_latency
+        self.stats_dir = stats_dir
+
+    def __call__(self, uri: str, auth=None, **kwargs) -> FakeDriver:
+        return FakeDriver(self.base_latency, self.row_latency, self.stats_dir)
+
+    def recording(self, stats_dir: str) -> 'FakeDriverFactory':
+        """Return a factory with the same latencies whose drivers report to `stats_dir`."""
+        return FakeDriverFactory(self.base_latency, self.row_latency, stats_dir)
+
+
+def collect_driver_stats(stats_dir: str) -> Dict[str, Any]:
+    """Sum the counts written by every closed `FakeDriver` in `stats_dir`."""
+    queries = Counter()
+    rows = 0
+    for name in os.listdir(stats_dir):
+        with open(os.path.join(stats_dir, name), 'r') as f:
+            stats = json.load(f)
+        queries.update(stats["queries"])
+        rows += stats["rows"]
+    return {"transactions": sum(queries.values()), "rows": rows, "queries": dict(queries)}
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {"p50": pick(0.50), "p90": pick(0.90), "p99": pick(0.99), "max": ordered[-1]}
+
+
+def peak_rss() -> Dict[str, float]:
+    """High-water RSS of this process and of its largest reaped child, in megabytes."""
+    return {"self": peak_rss_mb(), "children": peak_rss_mb(children=True)}
+
+
+def _run_isolated(target, queue, *args):
+    queue.put(target(*args))
+
+
+def isolated(target, *args) -> Dict[str, Any]:
+    """Run one benchmark case in a fresh process so peak RSS is not inherited from earlier cases."""
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run_isolated, args=(target, queue) + args)
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def bench_preprocess(raw_path: str, work_dir: str, workers: int, output_format: str) -> Dict[str, Any]:
+    start_time = time.time()
+    if workers == 1:
+        suffix = '.rec' if output_format == 'records' else '.jsonl'
+        count = preprocess_stream(raw_path, os.path.join(work_dir, f"stream{suffix}"), output_format)
+    else:
+        out_dir = os.path.join(work_dir, f"shards-{workers}-{output_format}")
+        count = preprocess_parallel(raw_path, out_dir, workers, output_format)['total_records']
+    elapsed = time.time() - start_time
+    return {
+        "stage": "preprocess",
+        "format": output_format,
+        "workers": workers,
+        "records": count,
+        "seconds": elapsed,
+        "records_per_sec": count / elapsed if elapsed > 0 else 0.0,
+        "peak_rss_mb": peak_rss(),
+    }
+
+
+def bench_ingest(
+        mode: str,
+        input_path: str,
+        workers: int,
+        batch_size: int,
+        factory: FakeDriverFactory
+) -> Dict[str, Any]:
+    latencies = []
+    ipc_bytes = [0]
+    lock = threading.Lock()
+
+    def on_batch(args, latency: float, success: bool):
+        # Re-pickling measures what the pool sent over the pipe for this task
+        size = len(pickle.dumps(args, protocol=pickle.HIGHEST_PROTOCOL))
+        with lock:
+            latencies.append(latency)
+            ipc_bytes[0] += size
+
+    with tempfile.TemporaryDirectory() as stats_dir:
+        factory = factory.recording(stats_dir)
+        start_time = time.time()
+        if mode == 'records':
+            count = ingest_record_files_parallel(
+                "fake://", "", "", list_record_files(input_path), batch_size=batch_size,
+                num_processes=workers, on_batch=on_batch, driver_factory=factory
+            )
+        else:
+            count = ingest_data_parallel(
+                "fake://", "", "", iter_papers(input_path), batch_size=batch_size,
+                num_processes=workers, on_batch=on_batch, driver_factory=factory
+            )
+        elapsed = time.time() - start_time
+        # The pool has joined, so every worker has closed its driver and written its counts
+        driver_stats = collect_driver_stats(stats_dir)
+    return {
+        "stage": "ingest",
+        "mode": mode,
+        "workers": workers,
+        "batch_size": batch_size,
+        "papers": count,
+        "seconds": elapsed,
+        "papers_per_sec": count / elapsed if elapsed > 0 else 0.0,
+        "batch_latency_s": percentiles(latencies),
+        "ipc_bytes": ipc_bytes[0],
+        "driver": driver_stats,
+        "peak_rss_mb": peak_rss(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark preprocessing and ingestion against a fake Neo4j')
+    parser.add_argument('--papers', type=int, default=20000, help='Size of the synthetic corpus')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='Worker counts to compare')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[500, 1000, 2000],
+                        help='Ingestion batch sizes to compare')
+    parser.add_argument('--base-latency-ms', type=float, default=2.0,
+                        help='Simulated fixed cost per transaction')
+    parser.add_argument('--row-latency-us', type=float, default=20.0,
+                        help='Simulated cost per unwound row')
+    parser.add_argument('--output', type=str, default='bench_results.json', help='JSON results file')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    factory = FakeDriverFactory(args.base_latency_ms / 1000, args.row_latency_us / 1e6)
+    results = []
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        raw_path = os.path.join(work_dir, "raw.jsonl")
+        print(f"Generating {args.papers} synthetic papers...")
+        generate_corpus(raw_path, args.papers, seed=args.seed)
+
+        for output_format in ('jsonl', 'records'):
+            for workers in args.workers:
+                result = isolated(bench_preprocess, raw_path, work_dir, workers, output_format)
+                print(f"preprocess {output_format:7s} workers={workers}: {result['records_per_sec']:.0f} records/sec")
+                results.append(result)
+
+        inputs = {
+            'merge': os.path.join(work_dir, "ingest.jsonl"),
+            'records': os.path.join(work_dir, "ingest.rec"),
+        }
+        preprocess_stream(raw_path, inputs['merge'], 'jsonl')
+        preprocess_stream(raw_path, inputs['records'], 'records')
+        for mode, input_path in inputs.items():
+            for workers in args.workers:
+                for batch_size in args.batch_sizes:
+                    result = isolated(bench_ingest, mode, input_path, workers, batch_size, factory)
+                    print(f"ingest {mode:7s} workers={workers} batch={batch_size}: "
+                          f"{result['papers_per_sec']:.0f} papers/sec, "
+                          f"p99 batch {result['batch_latency_s'].get('p99', 0) * 1000:.1f} ms, "
+                          f"IPC {result['ipc_bytes'] / 1e6:.1f} MB, "
+                          f"{result['driver']['transactions']} transactions")
+                    results.append(result)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": vars(args),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
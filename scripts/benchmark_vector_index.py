@@ -0,0 +1,105 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, Iterator
+
+import numpy as np
+
+from scripts.process_stats import git_commit, peak_rss_mb
+from src.components.database.local_vector_index import IVFIndex
+
+
+def synthetic_papers(count: int, dim: int, topics: int = 200, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Clustered random embeddings, so IVF partitions behave roughly like real topic structure."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(topics, dim)).astype(np.float32)
+    for i in range(count):
+        vector = centers[rng.integers(topics)] + 0.5 * rng.normal(size=dim).astype(np.float32)
+        yield {"id": f"synthetic-{i}", "abstract": "", "embedding": vector}
+
+
+def index_papers(index_dir: str) -> Iterator[Dict[str, Any]]:
+    """Re-read vectors from an existing index, e.g. one built from real Neo4j embeddings."""
+    source = IVFIndex(index_dir)
+    try:
+        for row in range(len(source)):
+            yield {"id": source.paper(row)["id"], "abstract": "", "embedding": source.vectors[row]}
+    finally:
+        source.close()
+
+
+def bench_index(index: IVFIndex, queries: np.ndarray, k: int, nprobe: int, rerank: int) -> Dict[str, Any]:
+    index.rerank = rerank
+    start_time = time.time()
+    for query in queries:
+        index.search(query, k, nprobe)
+    elapsed = time.time() - start_time
+    return {
+        "nprobe": nprobe,
+        "rerank": rerank,
+        "queries_per_sec": len(queries) / elapsed if elapsed > 0 else 0.0,
+        f"recall@{k}": index.recall(queries, k, nprobe),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark float, int8 and PQ vector storage for the local index')
+    parser.add_argument('--source', type=str, default=None,
+                        help='Existing index directory to take vectors from (default: synthetic)')
+    parser.add_argument('--papers', type=int, default=50000, help='Synthetic corpus size')
+    parser.add_argument('--dim', type=int, default=1536, help='Synthetic embedding dimension')
+    parser.add_argument('--pq-subspaces', type=int, default=96, help='PQ codes per vector')
+    parser.add_argument('--queries', type=int, default=200, help='Queries per configuration')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[8, 32])
+    parser.add_argument('--rerank', type=int, nargs='+', default=[1, 4, 16],
+                        help='Candidates rescored in float, as a multiple of k')
+    parser.add_argument('--output', type=str, default='vector_bench_results.json', help='JSON results file')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    dim = IVFIndex.read_meta(args.source)["dim"] if args.source else args.dim
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for quantization in ('none', 'int8', 'pq'):
+            papers = index_papers(args.source) if args.source else synthetic_papers(args.papers, dim, seed=args.seed)
+            start_time = time.time()
+            index = IVFIndex.build(
+                os.path.join(work_dir, quantization), papers, dim=dim, seed=args.seed,
+                quantization=quantization, pq_subspaces=args.pq_subspaces
+            )
+            build_seconds = time.time() - start_time
+            footprint = index.memory_footprint()
+            print(f"{quantization:5s}: built {len(index)} vectors in {build_seconds:.1f}s, "
+                  f"scanned storage {footprint['scanned_bytes'] / 1e6:.1f} MB "
+                  f"(float32 {footprint['vectors_bytes'] / 1e6:.1f} MB)")
+
+            rng = np.random.default_rng(args.seed)
+            rows = np.sort(rng.choice(len(index), size=min(args.queries, len(index)), replace=False))
+            # Perturb stored vectors so queries are near, but not identical to, indexed rows
+            queries = np.asarray(index.vectors[rows]) + 0.05 * rng.normal(size=(len(rows), dim)).astype(np.float32)
+            for nprobe in args.nprobe:
+                for rerank in (args.rerank if quantization != 'none' else [1]):
+                    result = bench_index(index, queries, args.k, nprobe, rerank)
+                    result.update({"quantization": quantization, "build_seconds": build_seconds, **footprint})
+                    print(f"  nprobe={nprobe} rerank={rerank}: {result['queries_per_sec']:.0f} queries/sec, "
+                          f"recall@{args.k}={result[f'recall@{args.k}']:.3f}")
+                    results.append(result)
+            index.close()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": vars(args),
+        "peak_rss_mb": peak_rss_mb(),
+        "results": results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from src.config.settings import Settings
+from src.components.database.local_vector_index import IVFIndex
+from src.components.database.neo4j_client import Neo4jClient
+from src.components.rag.embeddings import Embedding
+from src.components.rag.indexing import IndexingService
+
+settings = Settings()
+
+
+def report_recall(index: IVFIndex, num_queries: int, k: int, nprobes, seed: int = 0):
+    """Compare ANN results against exact search, using stored vectors as queries."""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(index), size=min(num_queries, len(index)), replace=False)
+    queries = np.asarray(index.vectors[np.sort(rows)])
+    for nprobe in nprobes:
+        start_time = time.time()
+        for query in queries:
+            index.search(query, k, nprobe)
+        elapsed = time.time() - start_time
+        recall = index.recall(queries, k, nprobe)
+        print(f"nprobe={nprobe}: recall@{k}={recall:.3f}, "
+              f"{len(queries) / elapsed if elapsed > 0 else 0.0:.0f} queries/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build a local IVF vector index from Paper embeddings in Neo4j')
+    parser.add_argument('--output', type=str, default=settings.local_vector_index_dir,
+                        help='Index directory (defaults to LOCAL_VECTOR_INDEX_DIR)')
+    parser.add_argument('--dim', type=int, default=1536, help='Embedding dimension')
+    parser.add_argument('--nlist', type=int, default=None, help='Number of clusters (default sqrt(n))')
+    parser.add_argument('--iterations', type=int, default=10, help='k-means iterations')
+    parser.add_argument('--quantization', type=str, choices=['none', 'int8', 'pq'], default='none',
+                        help='Compact code storage scanned at query time')
+    parser.add_argument('--pq-subspaces', type=int, default=96, help='PQ codes per vector')
+    parser.add_argument('--page-size', type=int, default=5000, help='Papers read from Neo4j per page')
+    parser.add_argument('--recall-only', action='store_true',
+                        help='Skip the export and only report recall for an existing index')
+    parser.add_argument('--queries', type=int, default=200, help='Queries used to measure recall')
+    parser.add_argument('--k', type=int, default=10, help='Neighbours compared for recall@k')
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 4, 16, 64], help='nprobe values to report')
+    args = parser.parse_args()
+
+    if not args.output:
+        parser.error("--output or LOCAL_VECTOR_INDEX_DIR is required")
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.recall_only:
+        index = IVFIndex(args.output)
+    else:
+        db_client = Neo4jClient(uri=settings.neo4j_uri, user=settings.neo4j_user, password=settings.neo4j_password)
+        try:
+            indexing = IndexingService(db_client=db_client, embedding_service=Embedding(api_key=settings.openai_api_key))
+            start_time = time.time()
+            index = IVFIndex.build(
+                args.output,
+                indexing.iter_embedded_papers(args.page_size),
+                dim=args.dim,
+                nlist=args.nlist,
+                iterations=args.iterations,
+                quantization=args.quantization,
+                pq_subspaces=args.pq_subspaces
+            )
+            print(f"Indexed {len(index)} papers into {index.meta['nlist']} clusters "
+                  f"in {time.time() - start_time:.1f}s at {args.output}")
+        finally:
+            db_client.close()
+
+    try:
+        report_recall(index, args.queries, args.k, args.nprobe)
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import argparse
+import csv
+import gzip
+import os
+import time
+from typing import Any, Dict, Iterable
+
+from src.components.database.ingest import iter_papers
+
+# Header rows use neo4j-admin's field syntax. ID spaces keep Paper ids and
+# Author/Category names apart and are stored as the `id` / `name` properties
+# that `OptimizedNeo4jIngestor.create_constraints` makes unique.
+FILES = {
+    'papers': ['id:ID(Paper)', 'title', 'abstract', 'submit_date', 'update_date', 'withdrawn:boolean', ':LABEL'],
+    'authors': ['name:ID(Author)', ':LABEL'],
+    'categories': ['name:ID(Category)', ':LABEL'],
+    'authored_by': [':START_ID(Paper)', ':END_ID(Author)', ':TYPE'],
+    'belongs_to': [':START_ID(Paper)', ':END_ID(Category)', ':TYPE'],
+}
+
+
+class BulkImportWriter:
+    """
+    Stream processed papers into deduplicated neo4j-admin import CSV files.
+
+    Only the keys seen so far are kept in memory (paper ids, author and
+    category names); paper rows are written as soon as they are read.
+    """
+
+    def __init__(self, output_dir: str, compress: bool = False):
+        self.output_dir = output_dir
+        self.suffix = '.csv.gz' if compress else '.csv'
+        os.makedirs(output_dir, exist_ok=True)
+
+        self._files = {}
+        self.writers = {}
+        for name, header in FILES.items():
+            path = self.path(name)
+            if compress:
+                handle = gzip.open(path, 'wt', encoding='utf-8', newline='')
+            else:
+                handle = open(path, 'w', encoding='utf-8', newline='')
+            self._files[name] = handle
+            self.writers[name] = csv.writer(handle)
+            self.writers[name].writerow(header)
+
+        self.paper_ids = set()
+        self.authors = set()
+        self.categories = set()
+        self.counts = {name: 0 for name in FILES}
+        self.duplicate_papers = 0
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.output_dir, name + self.suffix)
+
+    def write_paper(self, paper: Dict[str, Any]):
+        paper_id = paper['id']
+        if paper_id in self.paper_ids:
+            self.duplicate_papers += 1
+            return
+        self.paper_ids.add(paper_id)
+
+        self._write('papers', [
+            paper_id, paper['title'], paper['abstract'],
+            paper['submit_date'], paper['update_date'], 'false', 'Paper'
+        ])
+
+        # dict.fromkeys drops repeated names within one paper but keeps order
+        for author in dict.fromkeys(paper['authors']):
+            if author not in self.authors:
+                self.authors.add(author)
+                self._write('authors', [author, 'Author'])
+            self._write('authored_by', [paper_id, author, 'AUTHORED_BY'])
+
+        for category in dict.fromkeys(paper['categories']):
+            if category not in self.categories:
+                self.categories.add(category)
+                self._write('categories', [category, 'Category'])
+            self._write('belongs_to', [paper_id, category, 'BELONGS_TO'])
+
+    def write_all(self, papers: Iterable[Dict[str, Any]]) -> int:
+        for paper in papers:
+            self.write_paper(paper)
+        return self.counts['papers']
+
+    def _write(self, name: str, row):
+        self.writers[name].writerow(row)
+        self.counts[name] += 1
+
+    def import_command(self, database: str = 'neo4j') -> str:
+        return (
+            f"neo4j-admin database import full {database} --multiline-fields=true "
+            f"--nodes=Paper={self.path('papers')} "
+            f"--nodes=Author={self.path('authors')} "
+            f"--nodes=Category={self.path('categories')} "
+            f"--relationships=AUTHORED_BY={self.path('authored_by')} "
+            f"--relationships=BELONGS_TO={self.path('belongs_to')}"
+        )
+
+    def close(self):
+        for handle in self._files.values():
+            handle.close()
+
+    def __enter__(self) -> 'BulkImportWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export processed papers as neo4j-admin bulk import CSVs')
+    parser.add_argument('--input', type=str, default='processed_data.json',
+                        help='Processed JSON/JSONL file, record file, shard manifest or shard directory')
+    parser.add_argument('--output', type=str, required=True,
+                        help='Directory receiving the CSV files')
+    parser.add_argument('--compress', action='store_true',
+                        help='Write gzip-compressed CSV files')
+    parser.add_argument('--database', type=str, default='neo4j',
+                        help='Database name used in the printed import command')
+    args = parser.parse_args()
+
+    start_time = time.time()
+    print(f"Exporting {args.input} to {args.output}...")
+    try:
+        with BulkImportWriter(args.output, compress=args.compress) as writer:
+            writer.write_all(iter_papers(args.input))
+    except FileNotFoundError:
+        print(f"Error: Input file {args.input} not found")
+        return
+
+    elapsed = time.time() - start_time
+    for name, count in writer.counts.items():
+        print(f"  {name}: {count} rows")
+    if writer.duplicate_papers:
+        print(f"  skipped {writer.duplicate_papers} duplicate papers")
+    print(f"Export completed in {elapsed:.2f}s. With the database stopped, run:")
+    print(f"  {writer.import_command(args.database)}")
+    print("then start it and create the constraints with:")
+    print("  python -m src.components.database.ingest --constraints-only")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,46 @@
 import json
 import argparse
-from typing import List, Dict, Any
+import multiprocessing
+import os
+import time
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Iterator, Iterable, Tuple, Optional
+
+from scripts.process_stats import peak_rss_mb
+from src.components.database.delta_manifest import DeltaManifest
+from src.components.database.record_file import RecordFileWriter, INDEX_SUFFIX, RECORD_SUFFIX
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def iso_date(value: str) -> str:
+    """Convert arXiv's RFC 2822 version timestamps to `YYYY-MM-DD`, which sorts and range-compares correctly."""
+    try:
+        return parsedate_to_datetime(value).date().isoformat()
+    except (TypeError, ValueError):
+        return value
+
+
+def transform_paper(paper: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Transform a single raw arXiv record into the ingestion schema.
+
+    Args:
+        paper: Dictionary containing raw paper information
+
+    Returns:
+        Processed paper dictionary
+    """
+    return {
+        'id': paper['id'],
+        'title': paper['title'],
+        'abstract': paper['abstract'],
+        'categories': paper['categories'].split(),
+        'authors': [' '.join(author).strip()
+                    for author in paper['authors_parsed']],
+        'submit_date': iso_date(paper['versions'][0]['created']),
+        'update_date': paper['update_date']
+    }
 
 
 def preprocess_data(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -13,20 +53,240 @@ def preprocess_data(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     Returns:
         List of processed paper dictionaries
     """
-    processed_data = []
-    for paper in data:
-        processed_paper = {
-            'id': paper['id'],
-            'title': paper['title'],
-            'abstract': paper['abstract'],
-            'categories': paper['categories'].split(),
-            'authors': [' '.join(author).strip()
-                        for author in paper['authors_parsed']],
-            'submit_date': paper['versions'][0]['created'],
-            'update_date': paper['update_date']
-        }
-        processed_data.append(processed_paper)
-    return processed_data
+    return [transform_paper(paper) for paper in data]
+
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily read records from a JSON Lines file, one line at a time.
+
+    Args:
+        path: Path to the JSON Lines file
+
+    Yields:
+        One decoded record per non-empty line
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def write_jsonl(records: Iterable[Dict[str, Any]], path: str) -> int:
+    """
+    Write records to a JSON Lines file as they are produced.
+
+    Args:
+        records: Iterable of dictionaries to serialize
+        path: Output file path
+
+    Returns:
+        Number of records written
+    """
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n')
+            count += 1
+    return count
+
+
+def write_records(records: Iterable[Dict[str, Any]], path: str) -> int:
+    """
+    Write records to a memory-mappable record file with an offset index.
+
+    Args:
+        records: Iterable of dictionaries to serialize
+        path: Output file path; the index is written to `<path>.idx`
+
+    Returns:
+        Number of records written
+    """
+    with RecordFileWriter(path) as writer:
+        for record in records:
+            writer.write(record)
+        return len(writer)
+
+
+WRITERS = {
+    'jsonl': write_jsonl,
+    'records': write_records,
+}
+
+SHARD_SUFFIXES = {
+    'jsonl': '.jsonl',
+    'records': RECORD_SUFFIX,
+}
+
+
+def preprocess_stream(
+        input_path: str,
+        output_path: str,
+        output_format: str = 'jsonl',
+        delta: Optional[DeltaManifest] = None
+) -> int:
+    """
+    Preprocess a JSON Lines arXiv snapshot without loading it into memory.
+
+    Args:
+        input_path: Raw arXiv metadata in JSON Lines format
+        output_path: Destination file for processed papers
+        output_format: Either 'jsonl' or 'records'
+        delta: Optional manifest; when given only new or changed papers are written
+
+    Returns:
+        Number of papers written
+    """
+    write = WRITERS[output_format]
+    papers = (transform_paper(paper) for paper in iter_jsonl(input_path))
+    if delta is not None:
+        papers = delta.iter_changed(papers)
+    return write(papers, output_path)
+
+
+def sync_files(paths: Iterable[str]):
+    """
+    Flush written files to stable storage.
+
+    Args:
+        paths: Files that must survive a crash before the run is recorded as done
+    """
+    for path in paths:
+        with open(path, 'rb') as f:
+            os.fsync(f.fileno())
+
+
+def output_files(path: str, output_format: str) -> List[str]:
+    """Every file `WRITERS[output_format]` produces for `path`."""
+    return [path, path + INDEX_SUFFIX] if output_format == 'records' else [path]
+
+
+def write_tombstones(delta: DeltaManifest, path: str) -> int:
+    """
+    Write the ids that vanished from the snapshot and drop them from the manifest.
+
+    The removal only takes effect when the manifest is committed.
+
+    Args:
+        delta: Manifest that has just processed a full snapshot
+        path: JSON Lines output of `{"id": ...}` records
+
+    Returns:
+        Number of tombstoned papers
+    """
+    withdrawn = list(delta.withdrawn_ids())
+    write_jsonl(({'id': paper_id} for paper_id in withdrawn), path)
+    delta.forget(withdrawn)
+    return len(withdrawn)
+
+
+def compute_shards(path: str, num_shards: int) -> List[Tuple[int, int]]:
+    """
+    Split a file into contiguous byte ranges of roughly equal size.
+
+    Boundaries are not aligned to lines here; each worker realigns its range
+    so that a line belongs to the shard in which it starts.
+
+    Args:
+        path: Path to the JSON Lines input file
+        num_shards: Desired number of shards
+
+    Returns:
+        List of (start, end) byte offsets
+    """
+    size = os.path.getsize(path)
+    num_shards = max(1, min(num_shards, size or 1))
+    step = size // num_shards
+    bounds = [i * step for i in range(num_shards)] + [size]
+    return [(bounds[i], bounds[i + 1]) for i in range(num_shards)]
+
+
+def iter_jsonl_range(path: str, start: int, end: int) -> Iterator[Dict[str, Any]]:
+    """
+    Read the records whose lines start within the byte range [start, end).
+
+    Args:
+        path: Path to the JSON Lines file
+        start: Inclusive start offset
+        end: Exclusive end offset
+
+    Yields:
+        One decoded record per non-empty line in the range
+    """
+    with open(path, 'rb') as f:
+        if start > 0:
+            # Skip the tail of a line owned by the previous shard. Seeking one
+            # byte back keeps a line that starts exactly at `start`.
+            f.seek(start - 1)
+            f.readline()
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def _preprocess_shard(input_path: str, start: int, end: int, shard_path: str, output_format: str) -> int:
+    write = WRITERS[output_format]
+    return write((transform_paper(paper) for paper in iter_jsonl_range(input_path, start, end)), shard_path)
+
+
+def preprocess_parallel(
+        input_path: str,
+        output_dir: str,
+        num_workers: int = None,
+        output_format: str = 'jsonl'
+) -> Dict[str, Any]:
+    """
+    Preprocess a JSON Lines snapshot across a process pool, one byte-range shard per worker.
+
+    Each worker writes its own JSON Lines shard into `output_dir`, and a
+    manifest listing the shards is written alongside them.
+
+    Args:
+        input_path: Raw arXiv metadata in JSON Lines format
+        output_dir: Directory receiving the shards and the manifest
+        num_workers: Number of worker processes, defaults to the CPU count
+        output_format: Either 'jsonl' or 'records'
+
+    Returns:
+        The manifest dictionary
+    """
+    num_workers = num_workers or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+
+    shards = compute_shards(input_path, num_workers)
+    suffix = SHARD_SUFFIXES[output_format]
+    shard_names = [f"part-{i:05d}{suffix}" for i in range(len(shards))]
+    tasks = [
+        (input_path, start, end, os.path.join(output_dir, name), output_format)
+        for (start, end), name in zip(shards, shard_names)
+    ]
+
+    with multiprocessing.Pool(min(num_workers, len(tasks))) as pool:
+        counts = pool.starmap(_preprocess_shard, tasks)
+
+    manifest = {
+        'format': output_format,
+        'total_records': sum(counts),
+        'shards': [
+            {'path': name, 'records': count}
+            for name, count in zip(shard_names, counts)
+        ]
+    }
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def report_throughput(count: int, elapsed: float):
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"Processed {count} records in {elapsed:.2f}s "
+          f"({rate:.0f} records/sec, peak RSS {peak_rss_mb():.1f} MB)")
 
 
 def main():
@@ -36,10 +296,78 @@ def main():
                         help='Input JSON file path')
     parser.add_argument('--output', type=str, required=True,
                         help='Output JSON file path')
+    parser.add_argument('--stream', action='store_true',
+                        help='Read JSON Lines input record by record and write JSON Lines output')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Preprocess JSON Lines input in parallel byte-range shards; '
+                             '--output is then a directory receiving the shards and a manifest')
+    parser.add_argument('--format', type=str, choices=sorted(WRITERS), default='jsonl',
+                        help='Output format for --stream and --workers: JSON Lines, or a '
+                             'memory-mapped record file with an offset index')
+    parser.add_argument('--delta-manifest', type=str,
+                        help='SQLite manifest of id -> (update_date, content hash); with --stream '
+                             'only new or changed papers are written and the manifest is updated')
+    parser.add_argument('--tombstones', type=str,
+                        help='With --delta-manifest, write ids missing from this snapshot to this JSONL file')
 
     # Parse arguments
     args = parser.parse_args()
 
+    start_time = time.time()
+
+    if args.delta_manifest and not args.stream:
+        print("Error: --delta-manifest requires --stream")
+        return
+
+    if args.format != 'jsonl' and not (args.stream or args.workers):
+        print("Error: --format records requires --stream or --workers")
+        return
+
+    if args.workers:
+        print(f"Preprocessing {args.input} into shards under {args.output} with {args.workers} workers...")
+        try:
+            manifest = preprocess_parallel(args.input, args.output, args.workers, args.format)
+        except FileNotFoundError:
+            print(f"Error: Input file {args.input} not found")
+            return
+        except json.JSONDecodeError as e:
+            print(f"Error: Input file {args.input} is not valid JSON Lines: {str(e)}")
+            return
+        # Peak RSS covers the parent only; each worker streams its own shard
+        report_throughput(manifest['total_records'], time.time() - start_time)
+        print(f"Wrote {len(manifest['shards'])} shards and {os.path.join(args.output, MANIFEST_NAME)}")
+        return
+
+    if args.stream:
+        print(f"Streaming data from {args.input} to {args.output}...")
+        delta = DeltaManifest(args.delta_manifest) if args.delta_manifest else None
+        try:
+            count = preprocess_stream(args.input, args.output, args.format, delta)
+            if delta is not None:
+                print(f"Delta: {delta.new_count} new, {delta.changed_count} changed, "
+                      f"{delta.unchanged_count} unchanged")
+                written = output_files(args.output, args.format)
+                if args.tombstones:
+                    withdrawn = write_tombstones(delta, args.tombstones)
+                    written.append(args.tombstones)
+                    print(f"Wrote {withdrawn} tombstones to {args.tombstones}")
+                # Record the emitted papers only once the output is durable; any earlier
+                # failure leaves the manifest untouched so the next run emits them again
+                sync_files(written)
+                delta.commit()
+        except FileNotFoundError:
+            print(f"Error: Input file {args.input} not found")
+            return
+        except json.JSONDecodeError as e:
+            print(f"Error: Input file {args.input} is not valid JSON Lines: {str(e)}")
+            return
+        finally:
+            if delta is not None:
+                delta.close()
+        report_throughput(count, time.time() - start_time)
+        print("Processing completed successfully!")
+        return
+
     # Read input file
     print(f"Reading data from {args.input}...")
     try:
@@ -61,6 +389,7 @@ def main():
     try:
         with open(args.output, 'w') as f:
             json.dump(processed_data, f, indent=2)
+        report_throughput(len(processed_data), time.time() - start_time)
         print("Processing completed successfully!")
     except Exception as e:
         print(f"Error saving output file: {str(e)}")
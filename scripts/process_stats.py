@@ -0,0 +1,19 @@
+import resource
+import subprocess
+import sys
+from typing import Optional
+
+
+def peak_rss_mb(children: bool = False) -> float:
+    """Return the peak resident set size of this process, or of its largest reaped child, in megabytes."""
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def git_commit() -> Optional[str]:
+    """Return the checked-out commit, so benchmark results can be tied to the code that produced them."""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -1,16 +1,16 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import time
 import json
 
 from langchain_community.chat_models import ChatOpenAI
-from langchain.schema import AIMessage
+from langchain.schema import AIMessage, BaseMessage, HumanMessage
 
 from src.components.evaluation.experiment_tracker import ExperimentTracker
 from src.core.state import ConversationState
-from langchain.memory import ConversationBufferMemory
 from dotenv import load_dotenv
 from langchain.agents import initialize_agent, AgentType
 from langchain.tools.base import BaseTool
+from langchain_core.callbacks import BaseCallbackHandler
 from src.agents.base import BaseAgent
 
 load_dotenv()
@@ -24,30 +24,58 @@ class ResearchAssistant(BaseAgent):
     ):
         self.experiment_tracker = experiment_tracker
         self.llm = llm
-        self.memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
-        # Initialize the agent with the tools and LLM
+        # Initialize the agent with the tools and LLM. It keeps no memory of its own: the chat
+        # history comes from each session's state, so concurrent sessions never share it.
         self.agent_executor = initialize_agent(
             tools,
             self.llm,
             agent=AgentType.CHAT_CONVERSATIONAL_REACT_DESCRIPTION,
             verbose=True,
-            memory=self.memory,
             handle_parsing_errors=True
         )
 
-    def __call__(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    def __call__(
+            self,
+            state: Dict[str, Any],
+            callbacks: Optional[List[BaseCallbackHandler]] = None
+    ) -> Dict[str, Any]:
         last_message = state["messages"][-1]
         query_content = last_message.content
 
         start_time = time.time()
         self.experiment_tracker.experiment.log_parameter("input_query", query_content)
 
-        # Add user message to memory
-        self.memory.chat_memory.add_user_message(query_content)
-
         # 1) Run the agent
-        response_text = self.agent_executor.run(input=query_content)
+        response_text = self.agent_executor.run(
+            input=query_content, chat_history=self.chat_history(state), callbacks=callbacks
+        )
+        return self._finish(state, query_content, response_text, start_time)
+
+    async def acall(
+            self,
+            state: Dict[str, Any],
+            callbacks: Optional[List[BaseCallbackHandler]] = None
+    ) -> Dict[str, Any]:
+        """Async variant of `__call__`; tools run through their `_arun`, and the
+        executor awaits the actions of one step concurrently."""
+        last_message = state["messages"][-1]
+        query_content = last_message.content
 
+        start_time = time.time()
+        self.experiment_tracker.experiment.log_parameter("input_query", query_content)
+
+        response_text = await self.agent_executor.arun(
+            input=query_content, chat_history=self.chat_history(state), callbacks=callbacks
+        )
+        return self._finish(state, query_content, response_text, start_time)
+
+    def _finish(
+            self,
+            state: Dict[str, Any],
+            query_content: str,
+            response_text: str,
+            start_time: float
+    ) -> Dict[str, Any]:
         processing_time = time.time() - start_time
         self.experiment_tracker.experiment.log_metrics({
             "processing_time": processing_time,
@@ -70,16 +98,21 @@ class ResearchAssistant(BaseAgent):
             pass
         final_response = tool_answer
 
-        # Add final response to memory and state
-        state["messages"].append(AIMessage(content=final_response))
-        self.memory.chat_memory.add_ai_message(final_response)
-
+        # The caller adds the returned messages to the session state
         return {
             "messages": [AIMessage(content=final_response)],
             # Put the ground truth somewhere so we can pick it up in coordinator
             "tool_output": {"paper_ground_truth": ground_truth}
         }
 
+    @staticmethod
+    def chat_history(state: Dict[str, Any]) -> List[BaseMessage]:
+        """The session's earlier turns, i.e. every message before the one being answered."""
+        return [
+            message for message in state["messages"][:-1]
+            if isinstance(message, (HumanMessage, AIMessage))
+        ]
+
     def process_message(self, state: ConversationState) -> Dict[str, Any]:
         """Process a message. This method is required by BaseAgent but is not used."""
         # Since we're handling message processing in __call__, we can leave this empty just to not get an error.
@@ -0,0 +1,116 @@
+import re
+import time
+from typing import Any, Callable, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+FINAL_ANSWER_START = re.compile(r'"action"\s*:\s*"Final Answer"\s*,\s*"action_input"\s*:\s*"')
+JSON_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', '"': '"', '\\': '\\', '/': '/'}
+# Sent to `on_token` before a later completion's answer, so the UI discards the text shown so far
+ANSWER_RESTART = object()
+
+
+class FinalAnswerStreamHandler(BaseCallbackHandler):
+    """
+    Forward the agent's final answer to `on_token` while the LLM is still generating it.
+
+    The conversational ReAct agent answers with a JSON blob; tokens are
+    buffered until `"action": "Final Answer", "action_input": "` appears,
+    then the JSON string value is decoded and forwarded as it arrives, up to
+    its closing quote. Intermediate tool-selection completions are never
+    forwarded. `first_token_at` records when the first answer token was seen.
+
+    `streamed` holds the answer of the latest completion only. When the agent
+    is re-prompted (a parsing error, or another final answer after a tool
+    call) and a new answer starts after text was already shown, the handler
+    first sends `ANSWER_RESTART`.
+    """
+
+    # Under the async agent, handle tokens in order on the event loop instead of a thread pool
+    run_inline = True
+
+    def __init__(self, on_token: Callable[[str], None]):
+        self.on_token = on_token
+        self.first_token_at: Optional[float] = None
+        self.displayed = False
+        self._reset()
+
+    def _reset(self):
+        self.streamed = ""
+        self._buffer = ""
+        self._in_answer = False
+        self._done = False
+        self._escape = False
+        self._unicode = None
+        self._high_surrogate = None
+
+    def on_llm_start(self, serialized: Any, prompts: Any, **kwargs: Any):
+        self._reset()
+
+    def on_chat_model_start(self, serialized: Any, messages: Any, **kwargs: Any):
+        self._reset()
+
+    def on_llm_new_token(self, token: str, **kwargs: Any):
+        if self._done:
+            return
+        if not self._in_answer:
+            self._buffer += token
+            match = FINAL_ANSWER_START.search(self._buffer)
+            if not match:
+                return
+            self._in_answer = True
+            token = self._buffer[match.end():]
+        self._emit(self._decode(token))
+
+    def _decode(self, text: str) -> str:
+        decoded = []
+        for char in text:
+            if self._unicode is not None:
+                self._unicode += char
+                if len(self._unicode) == 4:
+                    decoded.append(self._code_point(int(self._unicode, 16)))
+                    self._unicode = None
+                continue
+            if self._high_surrogate is not None and (char != 'u' if self._escape else char != '\\'):
+                # A high surrogate must be followed directly by a `\u` low surrogate
+                decoded.append('\ufffd')
+                self._high_surrogate = None
+            if self._escape:
+                self._escape = False
+                if char == 'u':
+                    self._unicode = ""
+                else:
+                    decoded.append(JSON_ESCAPES.get(char, char))
+            elif char == '\\':
+                self._escape = True
+            elif char == '"':
+                self._done = True
+                break
+            else:
+                decoded.append(char)
+        return "".join(decoded)
+
+    def _code_point(self, code: int) -> str:
+        """Decode one `\\uXXXX` escape, joining UTF-16 surrogate pairs into a single character."""
+        if 0xD800 <= code <= 0xDBFF:
+            # A second high surrogate in a row replaces the unpaired first one
+            replaced = '\ufffd' if self._high_surrogate is not None else ""
+            self._high_surrogate = code
+            return replaced
+        if 0xDC00 <= code <= 0xDFFF:
+            if self._high_surrogate is None:
+                return '\ufffd'
+            high, self._high_surrogate = self._high_surrogate, None
+            return chr(0x10000 + ((high - 0xD800) << 10) + (code - 0xDC00))
+        return chr(code)
+
+    def _emit(self, text: str):
+        if not text:
+            return
+        if self.first_token_at is None:
+            self.first_token_at = time.time()
+        if not self.streamed and self.displayed:
+            self.on_token(ANSWER_RESTART)
+        self.streamed += text
+        self.displayed = True
+        self.on_token(text)
@@ -0,0 +1,91 @@
+import logging
+import threading
+from typing import Any, Dict, Iterable, Iterator, List
+
+
+class AdaptiveBatcher:
+    """
+    Size ingestion batches by relationship count and adapt the target to commit latency.
+
+    Each paper weighs `1 + len(authors) + len(categories)` rows: one MERGE per
+    paper, author and category in `_create_and_link_batch`, whose FOREACH
+    clauses keep one row per paper instead of multiplying authors by
+    categories. That tracks the work done inside one transaction far better
+    than a fixed paper count. After every commit the
+    target grows while latency stays under `target_latency / 2` and shrinks
+    when latency exceeds `target_latency` or the batch fails.
+    """
+
+    def __init__(
+            self,
+            target_rows: int = 5000,
+            min_rows: int = 200,
+            max_rows: int = 100000,
+            target_latency: float = 2.0,
+            growth: float = 1.25,
+            shrink: float = 0.5
+    ):
+        self.target_rows = target_rows
+        self.min_rows = min_rows
+        self.max_rows = max_rows
+        self.target_latency = target_latency
+        self.growth = growth
+        self.shrink = shrink
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self.batch_count = 0
+        self.total_rows = 0
+        self.smallest_batch = None
+        self.largest_batch = 0
+
+    @staticmethod
+    def weight(paper: Dict[str, Any]) -> int:
+        return 1 + len(paper.get('authors', ())) + len(paper.get('categories', ()))
+
+    def batches(self, papers: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+        """Group papers into batches whose total weight reaches the current target."""
+        batch = []
+        rows = 0
+        for paper in papers:
+            batch.append(paper)
+            rows += self.weight(paper)
+            if rows >= self.target_rows:
+                self._record_batch(rows)
+                yield batch
+                batch = []
+                rows = 0
+        if batch:
+            self._record_batch(rows)
+            yield batch
+
+    def _record_batch(self, rows: int):
+        self.batch_count += 1
+        self.total_rows += rows
+        self.largest_batch = max(self.largest_batch, rows)
+        self.smallest_batch = rows if self.smallest_batch is None else min(self.smallest_batch, rows)
+        self.logger.debug(f"Emitting batch of {rows} rows (target {self.target_rows})")
+
+    def observe(self, rows: int, latency: float, success: bool = True):
+        """Feed back the outcome of one committed (or failed) batch."""
+        with self._lock:
+            previous = self.target_rows
+            if not success or latency > self.target_latency:
+                target = int(previous * self.shrink)
+            elif latency < self.target_latency / 2 and rows >= previous * 0.9:
+                # Only grow on batches that actually reached the current target
+                target = int(previous * self.growth)
+            else:
+                return
+            self.target_rows = max(self.min_rows, min(self.max_rows, target))
+        if self.target_rows != previous:
+            reason = "failure" if not success else f"latency {latency:.2f}s for {rows} rows"
+            self.logger.info(f"Batch target {previous} -> {self.target_rows} rows ({reason})")
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batch_count,
+            "mean_rows": self.total_rows / self.batch_count if self.batch_count else 0,
+            "smallest_batch": self.smallest_batch or 0,
+            "largest_batch": self.largest_batch,
+            "final_target": self.target_rows,
+        }
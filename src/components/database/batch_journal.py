@@ -0,0 +1,129 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Well below SQLite's limit on bound parameters per statement
+LOOKUP_CHUNK = 500
+
+
+class BatchJournal:
+    """
+    SQLite journal of ingested items, used to resume an interrupted run.
+
+    Completion is recorded per item (paper, relationship pair or record row),
+    keyed by a digest of its content, not per batch. A resumed run drops the
+    items that are already done before batching, so it skips them however the
+    remainder is split: `--adaptive`, `--workers` and `--batch-size` may all
+    differ from the interrupted run. Ingestion Cypher is MERGE-based, so
+    replaying an item that was written but not journaled is harmless.
+
+    Batches are still recorded, so the failures of the current run can be
+    summarized.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # Written from the pool's result-handler thread, read from the producer
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS batches ("
+            "batch_id TEXT PRIMARY KEY, status TEXT NOT NULL, size INTEGER NOT NULL, "
+            "error TEXT, updated_at REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            "kind TEXT NOT NULL, digest BLOB NOT NULL, PRIMARY KEY (kind, digest)) WITHOUT ROWID"
+        )
+        self.conn.commit()
+        self.opened_at = time.time()
+        # Items dropped by `pending` because an earlier run completed them, per kind
+        self.skipped: Counter = Counter()
+
+    @staticmethod
+    def item_digest(payload: Any) -> bytes:
+        return hashlib.sha1(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')).digest()
+
+    @staticmethod
+    def batch_id(kind: str, digests: Sequence[bytes]) -> str:
+        return f"{kind}:{hashlib.sha1(b''.join(digests)).hexdigest()}"
+
+    def pending(
+            self,
+            kind: str,
+            items: Iterable[Any],
+            key: Optional[Callable[[Any], bytes]] = None
+    ) -> Iterator[Any]:
+        """Yield the items not yet ingested under `kind`, counting the rest in `skipped[kind]`."""
+        key = key or self.item_digest
+        items = iter(items)
+        while True:
+            chunk = [(key(item), item) for item in islice(items, LOOKUP_CHUNK)]
+            if not chunk:
+                return
+            done = self._done_digests(kind, [digest for digest, _ in chunk])
+            for digest, item in chunk:
+                if digest in done:
+                    self.skipped[kind] += 1
+                else:
+                    yield item
+
+    def _done_digests(self, kind: str, digests: List[bytes]) -> set:
+        placeholders = ", ".join("?" * len(digests))
+        with self._lock:
+            return {
+                row[0] for row in self.conn.execute(
+                    f"SELECT digest FROM items WHERE kind = ? AND digest IN ({placeholders})",
+                    [kind, *digests]
+                )
+            }
+
+    def mark_done(self, kind: str, digests: Sequence[bytes], size: int):
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO items (kind, digest) VALUES (?, ?)",
+                ((kind, digest) for digest in digests)
+            )
+            self._record(self.batch_id(kind, digests), 'done', size, None)
+
+    def mark_failed(self, kind: str, digests: Sequence[bytes], size: int, error: str) -> str:
+        """Record a failed batch and return its id."""
+        batch_id = self.batch_id(kind, digests)
+        with self._lock:
+            self._record(batch_id, 'failed', size, error)
+        return batch_id
+
+    def _record(self, batch_id: str, status: str, size: int, error: str):
+        # Caller holds `_lock`
+        self.conn.execute(
+            "INSERT INTO batches (batch_id, status, size, error, updated_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(batch_id) DO UPDATE SET status = excluded.status, size = excluded.size, "
+            "error = excluded.error, updated_at = excluded.updated_at",
+            (batch_id, status, size, error, time.time())
+        )
+        self.conn.commit()
+
+    def failed(self) -> List[Tuple[str, int, str]]:
+        """Return `(batch_id, size, error)` for every batch that failed in this run."""
+        # Items of earlier failed batches are retried in new batches, so their old rows are stale
+        with self._lock:
+            return list(self.conn.execute(
+                "SELECT batch_id, size, error FROM batches WHERE status = 'failed' AND updated_at >= ? "
+                "ORDER BY updated_at",
+                (self.opened_at,)
+            ))
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def __enter__(self) -> 'BatchJournal':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import sqlite3
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List
+
+
+class DeltaManifest:
+    """
+    Persisted `paper id -> (update_date, content hash)` map used for incremental refreshes.
+
+    The manifest describes what has already been emitted for ingestion. Each
+    run feeds the full snapshot through `iter_changed`, which yields only new
+    or modified papers and records every id it saw, so `withdrawn_ids` can
+    report papers that disappeared from the snapshot.
+
+    Nothing is persisted until `commit`, which callers invoke only after the
+    output of the run is safely on disk; closing without it, or leaving the
+    context manager on an exception, rolls the whole run back so an aborted
+    run re-emits the same papers next time.
+    """
+
+    def __init__(self, path: str, chunk_size: int = 500):
+        self.path = path
+        # Stays well below SQLite's bound-parameter limit for IN (...) lookups
+        self.chunk_size = chunk_size
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS papers ("
+            "id TEXT PRIMARY KEY, update_date TEXT, content_hash TEXT NOT NULL)"
+        )
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen (id TEXT PRIMARY KEY)")
+        self.conn.commit()
+        self.new_count = 0
+        self.changed_count = 0
+        self.unchanged_count = 0
+
+    @staticmethod
+    def content_hash(paper: Dict[str, Any]) -> str:
+        payload = json.dumps(paper, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def iter_changed(self, papers: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Yield the papers that are new or whose update_date or content changed."""
+        papers = iter(papers)
+        while True:
+            chunk = list(islice(papers, self.chunk_size))
+            if not chunk:
+                break
+            yield from self._filter_chunk(chunk)
+
+    def _filter_chunk(self, chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        ids = [paper['id'] for paper in chunk]
+        placeholders = ','.join('?' * len(ids))
+        known = {
+            row[0]: (row[1], row[2])
+            for row in self.conn.execute(
+                f"SELECT id, update_date, content_hash FROM papers WHERE id IN ({placeholders})", ids
+            )
+        }
+        self.conn.executemany("INSERT OR IGNORE INTO seen (id) VALUES (?)", ((i,) for i in ids))
+
+        changed = []
+        upserts = []
+        for paper in chunk:
+            entry = (paper.get('update_date'), self.content_hash(paper))
+            previous = known.get(paper['id'])
+            if previous == entry:
+                self.unchanged_count += 1
+                continue
+            if previous is None:
+                self.new_count += 1
+            else:
+                self.changed_count += 1
+            changed.append(paper)
+            upserts.append((paper['id'], *entry))
+
+        self.conn.executemany(
+            "INSERT INTO papers (id, update_date, content_hash) VALUES (?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET update_date = excluded.update_date, "
+            "content_hash = excluded.content_hash",
+            upserts
+        )
+        return changed
+
+    def withdrawn_ids(self) -> Iterator[str]:
+        """Ids known to the manifest that were not seen during this run."""
+        cursor = self.conn.execute("SELECT id FROM papers WHERE id NOT IN (SELECT id FROM seen)")
+        for row in cursor:
+            yield row[0]
+
+    def forget(self, ids: Iterable[str]):
+        """Drop withdrawn ids so they are emitted again if they ever reappear."""
+        self.conn.executemany("DELETE FROM papers WHERE id = ?", ((i,) for i in ids))
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        """Close the manifest, discarding anything not yet committed."""
+        self.conn.rollback()
+        self.conn.close()
+
+    def __enter__(self) -> 'DeltaManifest':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        self.close()
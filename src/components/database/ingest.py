@@ -1,28 +1,509 @@
+import argparse
 import json
+import logging
 import multiprocessing
+import os
+import sys
+import threading
 import time
+import zlib
+from functools import partial
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from dotenv import load_dotenv
 from src.config.settings import Settings
-from src.components.database.neo4j_ingestion import OptimizedNeo4jIngestor, worker
+from src.components.database.neo4j_ingestion import (
+    OptimizedNeo4jIngestor,
+    init_worker,
+    ingest_in_worker,
+    ingest_papers_in_worker,
+    ingest_range_in_worker,
+    link_authors_in_worker,
+    link_categories_in_worker
+)
+from src.components.database.adaptive_batcher import AdaptiveBatcher
+from src.components.database.batch_journal import BatchJournal
+from src.components.database.record_file import RecordFile, RECORD_SUFFIX
 
 load_dotenv()
 
-def ingest_data_parallel(uri: str, user: str, password: str, data, batch_size: int = 1000, num_processes: int = 4):
-    total = len(data)
-    batches = [data[i:i + batch_size] for i in range(0, total, batch_size)]
 
-    with multiprocessing.Pool(num_processes) as pool:
-        results = []
-        for batch in batches:
-            result = pool.apply_async(worker, (uri, user, password, batch))
-            results.append(result)
+def _iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
 
-        for i, result in enumerate(results):
-            result.get()  # Wait for the batch to complete
-            print(f"Ingested {min((i + 1) * batch_size, total)}/{total} papers")
+
+def _iter_record_file(path: str) -> Iterator[Dict[str, Any]]:
+    with RecordFile(path) as records:
+        yield from records
+
+
+def _resolve_input(path: str) -> str:
+    if os.path.isdir(path):
+        return os.path.join(path, 'manifest.json')
+    return path
+
+
+def _is_manifest(path: str) -> bool:
+    return os.path.basename(path) == 'manifest.json'
+
+
+def list_shards(manifest_path: str) -> List[str]:
+    """Return the absolute shard paths listed in a preprocessing manifest."""
+    with open(manifest_path, 'r') as f:
+        manifest = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    return [os.path.join(base_dir, shard['path']) for shard in manifest['shards']]
+
+
+def list_record_files(path: str) -> List[str]:
+    """Return the record files behind `path`, or an empty list if it is not in record format."""
+    path = _resolve_input(path)
+    files = list_shards(path) if _is_manifest(path) else [path]
+    if files and all(f.endswith(RECORD_SUFFIX) for f in files):
+        return files
+    return []
+
+
+def iter_papers(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over preprocessed papers.
+
+    Accepts a pretty-printed JSON array, a JSON Lines file, a record file, a
+    shard manifest written by scripts/preprocess.py, or a directory containing
+    such a manifest.
+    """
+    path = _resolve_input(path)
+
+    if _is_manifest(path):
+        for shard_path in list_shards(path):
+            yield from iter_papers(shard_path)
+    elif path.endswith(RECORD_SUFFIX):
+        yield from _iter_record_file(path)
+    elif path.endswith('.jsonl'):
+        yield from _iter_jsonl(path)
+    else:
+        with open(path, 'r') as f:
+            yield from json.load(f)
+
+
+def iter_batches(papers: Iterable[Dict[str, Any]], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    papers = iter(papers)
+    while True:
+        batch = list(islice(papers, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def run_pipeline(
+        uri: str,
+        user: str,
+        password: str,
+        func: Callable[..., Tuple[int, float]],
+        tasks: Iterable[Tuple[int, List[bytes], Tuple]],
+        num_processes: int = 4,
+        max_pending: Optional[int] = None,
+        total: Optional[int] = None,
+        retries: int = 0,
+        journal: Optional[BatchJournal] = None,
+        kind: str = "papers",
+        on_batch: Optional[Callable[[Tuple, float, bool], None]] = None,
+        driver_factory: Optional[Callable[..., Any]] = None
+) -> int:
+    """
+    Feed tasks to a pool of long-lived ingestion workers with bounded backpressure.
+
+    `tasks` yields `(size, digests, args)` and is pulled lazily; at most
+    `max_pending` tasks are queued or running at any time, so memory stays
+    bounded however large the input is. Each worker opens its Neo4j driver
+    once via `init_worker` and retries failed batches with exponential backoff.
+    Progress is reported as batches complete, in completion order.
+
+    Without a journal the first failure stops submission and is re-raised.
+    With a journal, `digests` are the journal keys of the batch's items, which
+    the caller has already filtered through `journal.pending(kind, ...)`.
+    Every outcome is recorded, and failures are left in the journal for the
+    caller to summarize.
+    `on_batch(args, latency, success)` is called after every batch, e.g. to
+    feed an `AdaptiveBatcher`. `driver_factory` replaces `GraphDatabase.driver`
+    in the workers and must be picklable.
+
+    Returns:
+        Number of papers ingested, including those skipped via the journal
+    """
+    max_pending = max_pending or num_processes * 2
+    slots = threading.BoundedSemaphore(max_pending)
+    lock = threading.Lock()
+    state = {"done": 0, "error": None}
+    skipped_before = journal.skipped[kind] if journal is not None else 0
+
+    def skipped() -> int:
+        return journal.skipped[kind] - skipped_before if journal is not None else 0
+
+    def report(done: int):
+        print(f"Ingested {done}/{total} papers" if total else f"Ingested {done} papers")
+
+    def on_done(digests: List[bytes], args: Tuple, result: Tuple[int, float]):
+        count, latency = result
+        if on_batch is not None:
+            on_batch(args, latency, True)
+        if journal is not None:
+            journal.mark_done(kind, digests, count)
+        with lock:
+            state["done"] += count
+            done = state["done"]
+        report(done + skipped())
+        slots.release()
+
+    def on_error(digests: List[bytes], size: int, args: Tuple, error: BaseException):
+        if on_batch is not None:
+            on_batch(args, 0.0, False)
+        if journal is not None:
+            batch_id = journal.mark_failed(kind, digests, size, repr(error))
+            print(f"Batch {batch_id} failed after {retries + 1} attempts: {error!r}")
+        else:
+            with lock:
+                if state["error"] is None:
+                    state["error"] = error
+        slots.release()
+
+    pool = multiprocessing.Pool(
+        num_processes, initializer=init_worker, initargs=(uri, user, password, retries, 1.0, driver_factory)
+    )
+    try:
+        for size, digests, args in tasks:
+            slots.acquire()
+            if state["error"] is not None:
+                break
+            pool.apply_async(
+                func, args,
+                callback=partial(on_done, digests, args),
+                error_callback=partial(on_error, digests, size, args)
+            )
+        pool.close()
+        pool.join()
+    except BaseException:
+        pool.terminate()
+        raise
+
+    if state["error"] is not None:
+        raise state["error"]
+    return state["done"] + skipped()
+
+
+def paper_tasks(
+        journal: Optional[BatchJournal],
+        batches: Iterable[List[Dict[str, Any]]]
+) -> Iterator[Tuple[int, List[bytes], Tuple]]:
+    """Turn paper batches into `run_pipeline` tasks, with journal keys when journaling."""
+    for batch in batches:
+        digests = [BatchJournal.item_digest(paper) for paper in batch] if journal is not None else []
+        yield len(batch), digests, (batch,)
+
+
+def ingest_data_parallel(
+        uri: str,
+        user: str,
+        password: str,
+        data,
+        batch_size: int = 1000,
+        num_processes: int = 4,
+        retries: int = 0,
+        journal: Optional[BatchJournal] = None,
+        batcher: Optional[AdaptiveBatcher] = None,
+        on_batch: Optional[Callable[[Tuple, float, bool], None]] = None,
+        driver_factory: Optional[Callable[..., Any]] = None
+):
+    """
+    Ingest an iterable of papers; lists report progress against their length.
+
+    With a `batcher`, batches are sized by relationship count and the target
+    adapts to observed commit latency instead of using a fixed `batch_size`.
+    Papers completed by an earlier run with the same journal are dropped
+    before batching, so the batch sizes of the two runs need not match.
+    """
+    total = len(data) if hasattr(data, '__len__') else None
+    if journal is not None:
+        data = journal.pending("papers", data)
+    batches = batcher.batches(data) if batcher is not None else iter_batches(data, batch_size)
+    tasks = paper_tasks(journal, batches)
+    callback = on_batch
+    if batcher is not None:
+        def callback(args: Tuple, latency: float, success: bool):
+            # The batcher reasons in relationship rows, not papers
+            rows = sum(AdaptiveBatcher.weight(paper) for paper in args[0])
+            batcher.observe(rows, latency, success)
+            if on_batch is not None:
+                on_batch(args, latency, success)
+    return run_pipeline(uri, user, password, ingest_in_worker, tasks, num_processes=num_processes,
+                        total=total, retries=retries, journal=journal, kind="papers", on_batch=callback,
+                        driver_factory=driver_factory)
+
+
+def record_row_digest(source: List[Any], row: int) -> bytes:
+    return BatchJournal.item_digest([*source, row])
+
+
+def iter_ranges(rows: Iterable[int], batch_size: int) -> Iterator[Tuple[int, int]]:
+    """Group ascending row numbers into contiguous `[start, end)` ranges of at most `batch_size` rows."""
+    start = end = None
+    for row in rows:
+        if start is not None and row == end and end - start < batch_size:
+            end += 1
+            continue
+        if start is not None:
+            yield start, end
+        start, end = row, row + 1
+    if start is not None:
+        yield start, end
+
+
+def ingest_record_files_parallel(
+        uri: str,
+        user: str,
+        password: str,
+        paths: List[str],
+        batch_size: int = 1000,
+        num_processes: int = 4,
+        retries: int = 0,
+        journal: Optional[BatchJournal] = None,
+        on_batch: Optional[Callable[[Tuple, float, bool], None]] = None,
+        driver_factory: Optional[Callable[..., Any]] = None
+):
+    """
+    Ingest record files by handing workers `(path, start, end)` row ranges.
+
+    Only the offsets cross the process boundary; each worker maps the file
+    and decodes its own rows, so the parent never materializes the corpus.
+    The journal records rows, so a resumed run only covers the rows still
+    missing, in ranges of at most `batch_size`.
+    """
+    counts = []
+    for path in paths:
+        with RecordFile(path) as records:
+            counts.append(len(records))
+    total = sum(counts)
+
+    def iter_tasks() -> Iterator[Tuple[int, List[bytes], Tuple]]:
+        for path, count in zip(paths, counts):
+            stat = os.stat(path)
+            # Row keys are stable for as long as the file itself is unchanged
+            row_key = partial(record_row_digest, [os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+            rows = journal.pending("records", range(count), key=row_key) if journal is not None else range(count)
+            for start, end in iter_ranges(rows, batch_size):
+                digests = [row_key(row) for row in range(start, end)] if journal is not None else []
+                yield end - start, digests, (path, start, end)
+
+    return run_pipeline(uri, user, password, ingest_range_in_worker, iter_tasks(), num_processes=num_processes,
+                        total=total, retries=retries, journal=journal, kind="records", on_batch=on_batch,
+                        driver_factory=driver_factory)
+
+
+def run_partitioned(
+        uri: str,
+        user: str,
+        password: str,
+        func: Callable[[List[Dict[str, str]]], int],
+        pairs: Iterable[Dict[str, str]],
+        batch_size: int = 1000,
+        num_processes: int = 4,
+        label: str = "relationships",
+        retries: int = 0,
+        journal: Optional[BatchJournal] = None,
+        driver_factory: Optional[Callable[..., Any]] = None
+) -> int:
+    """
+    Create relationships in batches partitioned by their shared endpoint.
+
+    Each pair is routed to a partition by a stable hash of `pair['name']`, and
+    at most one batch per partition is in flight at a time, so no two workers
+    ever lock the same Author or Category node. Rows within a batch are sorted
+    by paper id so concurrent transactions take Paper locks in the same order.
+    With a journal, pairs completed by an earlier run are dropped before they
+    are partitioned, so `num_processes` may differ between runs; otherwise
+    journal handling matches `run_pipeline`.
+
+    Returns:
+        Number of relationships written
+    """
+    buffers: List[List[Dict[str, str]]] = [[] for _ in range(num_processes)]
+    busy = [False] * num_processes
+    cond = threading.Condition()
+    state = {"done": 0, "error": None}
+
+    def on_done(partition: int, digests: List[bytes], result: Tuple[int, float]):
+        count, _ = result
+        if journal is not None:
+            journal.mark_done(label, digests, count)
+        with cond:
+            state["done"] += count
+            busy[partition] = False
+            done = state["done"]
+            cond.notify_all()
+        print(f"Linked {done} {label}")
+
+    def on_error(partition: int, digests: List[bytes], size: int, error: BaseException):
+        if journal is not None:
+            batch_id = journal.mark_failed(label, digests, size, repr(error))
+            print(f"Batch {batch_id} failed after {retries + 1} attempts: {error!r}")
+        with cond:
+            if journal is None and state["error"] is None:
+                state["error"] = error
+            busy[partition] = False
+            cond.notify_all()
+
+    def submit(partition: int) -> bool:
+        # Caller holds `cond`
+        batch = sorted(buffers[partition], key=lambda pair: (pair["paper_id"], pair["name"]))
+        buffers[partition] = []
+        digests = [BatchJournal.item_digest(pair) for pair in batch] if journal is not None else []
+        while busy[partition] and state["error"] is None:
+            cond.wait()
+        if state["error"] is not None:
+            return False
+        busy[partition] = True
+        pool.apply_async(
+            func, (batch,),
+            callback=partial(on_done, partition, digests),
+            error_callback=partial(on_error, partition, digests, len(batch))
+        )
+        return True
+
+    pool = multiprocessing.Pool(
+        num_processes, initializer=init_worker, initargs=(uri, user, password, retries, 1.0, driver_factory)
+    )
+    skipped_before = journal.skipped[label] if journal is not None else 0
+    if journal is not None:
+        pairs = journal.pending(label, pairs)
+    try:
+        # Buffers are only touched by this thread; `cond` guards `busy` and `state`
+        for pair in pairs:
+            partition = zlib.crc32(pair["name"].encode("utf-8")) % num_processes
+            buffers[partition].append(pair)
+            if len(buffers[partition]) >= batch_size:
+                with cond:
+                    if not submit(partition):
+                        break
+        with cond:
+            for partition in range(num_processes):
+                if buffers[partition] and not submit(partition):
+                    break
+        pool.close()
+        pool.join()
+    except BaseException:
+        pool.terminate()
+        raise
+
+    if state["error"] is not None:
+        raise state["error"]
+    return state["done"] + (journal.skipped[label] - skipped_before if journal is not None else 0)
+
+
+def ingest_two_phase(
+        uri: str,
+        user: str,
+        password: str,
+        source: Callable[[], Iterable[Dict[str, Any]]],
+        batch_size: int = 1000,
+        num_processes: int = 4,
+        retries: int = 0,
+        journal: Optional[BatchJournal] = None,
+        driver_factory: Optional[Callable[..., Any]] = None
+):
+    """
+    Ingest without lock contention on shared Author and Category nodes.
+
+    Phase 1 collects the distinct authors and categories and creates them once
+    with UNWIND. Phase 2 creates Paper nodes in parallel (ids never collide),
+    then the AUTHORED_BY and BELONGS_TO relationships through `run_partitioned`.
+    `source` is called once per pass and must return a fresh iterable of papers.
+    """
+    authors = set()
+    categories = set()
+    for paper in source():
+        authors.update(paper["authors"])
+        categories.update(paper["categories"])
+    print(f"Phase 1: creating {len(authors)} authors and {len(categories)} categories")
+
+    ingestor = OptimizedNeo4jIngestor(uri, user, password, driver_factory)
+    try:
+        ingestor.create_categories(sorted(categories))
+        for batch in iter_batches(sorted(authors), batch_size * 10):
+            ingestor.create_authors(batch)
+    finally:
+        ingestor.close()
+    del authors, categories
+
+    print("Phase 2: creating papers")
+    papers = journal.pending("paper-nodes", source()) if journal is not None else source()
+    tasks = paper_tasks(journal, iter_batches(papers, batch_size))
+    run_pipeline(uri, user, password, ingest_papers_in_worker, tasks, num_processes=num_processes,
+                 retries=retries, journal=journal, kind="paper-nodes", driver_factory=driver_factory)
+
+    print("Phase 2: linking authors")
+    author_pairs = (
+        {"paper_id": paper["id"], "name": name}
+        for paper in source() for name in paper["authors"]
+    )
+    run_partitioned(uri, user, password, link_authors_in_worker, author_pairs,
+                    batch_size=batch_size, num_processes=num_processes, label="authorships",
+                    retries=retries, journal=journal, driver_factory=driver_factory)
+
+    print("Phase 2: linking categories")
+    category_pairs = (
+        {"paper_id": paper["id"], "name": name}
+        for paper in source() for name in paper["categories"]
+    )
+    run_partitioned(uri, user, password, link_categories_in_worker, category_pairs,
+                    batch_size=batch_size, num_processes=num_processes, label="category memberships",
+                    retries=retries, journal=journal, driver_factory=driver_factory)
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Ingest preprocessed papers into Neo4j')
+    parser.add_argument('--input', type=str, default='processed_data.json',
+                        help='Processed JSON/JSONL file, shard manifest or shard directory')
+    parser.add_argument('--tombstones', type=str,
+                        help='JSONL file of withdrawn paper ids written by preprocess --tombstones')
+    parser.add_argument('--mode', type=str, choices=['merge', 'two-phase'], default='merge',
+                        help='merge: one MERGE query per paper batch; two-phase: create shared '
+                             'nodes once, then papers and relationships partitioned by endpoint')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Number of ingestion worker processes')
+    parser.add_argument('--journal', type=str,
+                        help='SQLite ingestion journal; rerunning with the same journal skips completed papers')
+    parser.add_argument('--retries', type=int, default=3,
+                        help='Retries per failed batch, with exponential backoff')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='Papers per batch (relationship pairs per batch in two-phase mode)')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Merge mode: size batches by relationship count and adapt to commit latency')
+    parser.add_argument('--target-latency', type=float,
+                        help='With --adaptive: commit latency in seconds the batcher aims to stay under '
+                             '(default: 2.0)')
+    parser.add_argument('--constraints-only', action='store_true',
+                        help='Only create the uniqueness constraints, e.g. after a neo4j-admin bulk import')
+    args = parser.parse_args()
+
+    # AdaptiveBatcher reports every batch resize through logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    # Two-phase and record-file ingestion use fixed batches, so the batcher would be silently ignored
+    if args.adaptive and (args.mode == 'two-phase' or list_record_files(args.input)):
+        print("Error: --adaptive is only supported in merge mode with JSON or JSONL input")
+        return
+
+    if args.target_latency is not None and not args.adaptive:
+        print("Error: --target-latency requires --adaptive")
+        return
+
     settings = Settings()
     uri = settings.neo4j_uri
     user = settings.neo4j_user
@@ -32,18 +513,49 @@ def main():
     ingestor = OptimizedNeo4jIngestor(uri, user, password)
     ingestor.create_constraints()
     ingestor.close()
+    if args.constraints_only:
+        print("Constraints created.")
+        return
 
-    # Load data
-    with open('processed_data.json', 'r') as f:
-        processed_data = json.load(f)
+    journal = BatchJournal(args.journal) if args.journal else None
+    options = dict(batch_size=args.batch_size, num_processes=args.workers, retries=args.retries, journal=journal)
+    batcher = AdaptiveBatcher(target_latency=args.target_latency or 2.0) if args.adaptive else None
 
-    # Ingest in parallel
     start_time = time.time()
-    ingest_data_parallel(uri, user, password, processed_data, batch_size=1000, num_processes=4)
+    record_files = list_record_files(args.input)
+    if args.mode == 'two-phase':
+        ingest_two_phase(uri, user, password, partial(iter_papers, args.input), **options)
+    elif record_files:
+        # Workers read their own row ranges from the memory-mapped files
+        ingest_record_files_parallel(uri, user, password, record_files, **options)
+    else:
+        # Stream papers from disk straight into the bounded pipeline
+        ingest_data_parallel(uri, user, password, iter_papers(args.input), batcher=batcher, **options)
+        if batcher is not None:
+            print(f"Adaptive batching: {batcher.summary()}")
+
+    if args.tombstones:
+        paper_ids = [paper['id'] for paper in _iter_jsonl(args.tombstones)]
+        ingestor = OptimizedNeo4jIngestor(uri, user, password)
+        try:
+            for i in range(0, len(paper_ids), 1000):
+                ingestor.tombstone_batch(paper_ids[i:i + 1000])
+        finally:
+            ingestor.close()
+        print(f"Tombstoned {len(paper_ids)} withdrawn papers")
     end_time = time.time()
 
     print(f"Total ingestion time: {end_time - start_time:.2f} seconds")
 
+    if journal is not None:
+        failed = journal.failed()
+        journal.close()
+        if failed:
+            print(f"{len(failed)} batches failed; rerun with --journal {args.journal} to retry them:")
+            for batch_id, size, error in failed:
+                print(f"  {batch_id} ({size} rows): {error}")
+            sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
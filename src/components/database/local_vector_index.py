@@ -0,0 +1,253 @@
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.components.database.record_file import RecordFile, RecordFileWriter
+from src.components.database.vector_quantization import QUANTIZERS, ProductQuantizer, ScalarQuantizer
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the `k` highest scores, best first."""
+    k = min(k, len(scores))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+class IVFIndex:
+    """
+    Inverted-file ANN index over cosine similarity, built and searched with NumPy.
+
+    Vectors are L2-normalized and stored contiguously per k-means cluster, so
+    probing a cluster reads one slice of the memory-mapped matrix. Paper ids
+    and abstracts are stored alongside in a `RecordFile` with the same row
+    order, so hits need no database round trip. Scores use the same
+    `(1 + cosine) / 2` scale as Neo4j's vector index.
+
+    With `quantization="int8"` or `"pq"` the probed clusters are scanned over
+    compact codes (`codes.npy`) instead, and only the best `k * rerank`
+    candidates are rescored exactly against the float matrix. The float
+    rows are then read on demand through the memory map, so the resident
+    set is the codes rather than the full-precision vectors.
+
+    Directory layout: `meta.json`, `centroids.npy`, `offsets.npy`,
+    `vectors.npy`, `papers.rec` (+ `.idx`) and, when quantized, `codes.npy`
+    plus the quantizer parameters.
+    """
+
+    def __init__(self, directory: str, nprobe: int = 16, rerank: int = 4):
+        self.directory = directory
+        self.nprobe = nprobe
+        self.rerank = rerank
+        self.meta = self.read_meta(directory)
+        self.centroids = np.load(os.path.join(directory, "centroids.npy"))
+        self.offsets = np.load(os.path.join(directory, "offsets.npy"))
+        self.vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+        self.papers = RecordFile(os.path.join(directory, "papers.rec"))
+        self.quantizer = None
+        self.codes = None
+        quantization = self.meta.get("quantization", "none")
+        if quantization != "none":
+            self.quantizer = QUANTIZERS[quantization].load(directory)
+            self.codes = np.load(os.path.join(directory, "codes.npy"), mmap_mode="r")
+
+    @staticmethod
+    def read_meta(directory: str) -> Dict[str, Any]:
+        """Read an index's `meta.json` without mapping its files."""
+        with open(os.path.join(directory, "meta.json"), "r") as f:
+            return json.load(f)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def close(self):
+        self.papers.close()
+
+    def memory_footprint(self) -> Dict[str, int]:
+        """Bytes scanned per search (codes when quantized) versus full-precision storage."""
+        scanned = self.codes if self.codes is not None else self.vectors
+        return {
+            "vectors_bytes": int(self.vectors.nbytes),
+            "scanned_bytes": int(scanned.nbytes),
+            "centroids_bytes": int(self.centroids.nbytes),
+        }
+
+    def search(self, query: np.ndarray, k: int = 3, nprobe: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Return `(row, score)` for the best `k` rows among the `nprobe` closest clusters."""
+        query = _normalize(np.asarray(query, dtype=np.float32))
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        clusters = _top_k(self.centroids @ query, nprobe)
+
+        prepared = self.quantizer.prepare(query) if self.quantizer is not None else None
+        rows = []
+        sims = []
+        for cluster in clusters:
+            start, end = int(self.offsets[cluster]), int(self.offsets[cluster + 1])
+            if start == end:
+                continue
+            if prepared is not None:
+                sims.append(self.quantizer.score(prepared, self.codes[start:end]))
+            else:
+                sims.append(self.vectors[start:end] @ query)
+            rows.append(np.arange(start, end))
+        if not rows:
+            return []
+        rows = np.concatenate(rows)
+        sims = np.concatenate(sims)
+        if prepared is not None:
+            # Rescore the best approximate candidates against the float vectors
+            candidates = np.sort(rows[_top_k(sims, k * self.rerank)])
+            rows = candidates
+            sims = self.vectors[candidates] @ query
+        best = _top_k(sims, k)
+        return [(int(rows[i]), float((1 + sims[i]) / 2)) for i in best]
+
+    def exact_search(self, query: np.ndarray, k: int = 3, chunk_size: int = 65536) -> List[Tuple[int, float]]:
+        """Brute-force search over every row, used as ground truth for recall."""
+        query = _normalize(np.asarray(query, dtype=np.float32))
+        best_rows = np.empty(0, dtype=np.int64)
+        best_sims = np.empty(0, dtype=np.float32)
+        for start in range(0, len(self.vectors), chunk_size):
+            sims = self.vectors[start:start + chunk_size] @ query
+            top = _top_k(sims, k)
+            best_rows = np.concatenate([best_rows, top + start])
+            best_sims = np.concatenate([best_sims, sims[top]])
+            keep = _top_k(best_sims, k)
+            best_rows, best_sims = best_rows[keep], best_sims[keep]
+        return [(int(row), float((1 + sim) / 2)) for row, sim in zip(best_rows, best_sims)]
+
+    def recall(self, queries: np.ndarray, k: int = 10, nprobe: Optional[int] = None) -> float:
+        """Mean fraction of the exact top-k that the ANN search also returns."""
+        if len(queries) == 0:
+            return 0.0
+        total = 0.0
+        for query in queries:
+            exact = {row for row, _ in self.exact_search(query, k)}
+            approx = {row for row, _ in self.search(query, k, nprobe)}
+            total += len(exact & approx) / max(1, len(exact))
+        return total / len(queries)
+
+    def paper(self, row: int) -> Dict[str, Any]:
+        return self.papers.read_range(row, row + 1)[0]
+
+    @classmethod
+    def build(
+            cls,
+            directory: str,
+            papers: Iterable[Dict[str, Any]],
+            dim: int = 1536,
+            nlist: Optional[int] = None,
+            iterations: int = 10,
+            sample_size: int = 100000,
+            seed: int = 0,
+            quantization: str = "none",
+            pq_subspaces: int = 96
+    ) -> 'IVFIndex':
+        """
+        Build an index from `{"id", "abstract", "embedding"}` records.
+
+        `quantization` is `"none"`, `"int8"` (scalar) or `"pq"` (product
+        quantization with `pq_subspaces` one-byte codes per vector); the
+        quantizer is trained on the same sample as the clusters.
+
+        Vectors are streamed to a staging file first, k-means is trained on a
+        sample, and the final matrix is written in cluster order, so memory
+        stays bounded by the sample and one chunk rather than the corpus.
+        """
+        os.makedirs(directory, exist_ok=True)
+        staging_vectors = os.path.join(directory, "staging.f32")
+        staging_papers = os.path.join(directory, "staging.rec")
+
+        count = 0
+        with open(staging_vectors, "wb") as f, RecordFileWriter(staging_papers) as writer:
+            for paper in papers:
+                vector = np.asarray(paper["embedding"], dtype=np.float32)
+                if vector.shape != (dim,):
+                    raise ValueError(f"Paper {paper['id']} has an embedding of shape {vector.shape}, expected ({dim},)")
+                f.write(_normalize(vector).tobytes())
+                writer.write({"id": paper["id"], "abstract": paper.get("abstract") or ""})
+                count += 1
+        if count == 0:
+            raise ValueError("No embedded papers to index")
+
+        staged = np.memmap(staging_vectors, dtype=np.float32, mode="r", shape=(count, dim))
+        nlist = nlist or max(1, int(np.sqrt(count)))
+        rng = np.random.default_rng(seed)
+        sample = staged[np.sort(rng.choice(count, size=min(sample_size, count), replace=False))]
+        sample = np.asarray(sample)
+        centroids = cls._kmeans(sample, nlist, iterations, rng)
+        quantizer = None
+        if quantization == "int8":
+            quantizer = ScalarQuantizer()
+        elif quantization == "pq":
+            quantizer = ProductQuantizer(subspaces=pq_subspaces)
+        elif quantization != "none":
+            raise ValueError(f"Unknown quantization: {quantization}")
+        if quantizer is not None:
+            quantizer.train(sample, rng)
+            quantizer.save(directory)
+
+        assignments = np.empty(count, dtype=np.int64)
+        for start in range(0, count, 65536):
+            assignments[start:start + 65536] = np.argmax(staged[start:start + 65536] @ centroids.T, axis=1)
+        order = np.argsort(assignments, kind="stable")
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments, minlength=nlist), out=offsets[1:])
+
+        vectors = np.lib.format.open_memmap(
+            os.path.join(directory, "vectors.npy"), mode="w+", dtype=np.float32, shape=(count, dim)
+        )
+        codes = None
+        if quantizer is not None:
+            code_width = pq_subspaces if quantization == "pq" else dim
+            code_type = np.uint8 if quantization == "pq" else np.int8
+            codes = np.lib.format.open_memmap(
+                os.path.join(directory, "codes.npy"), mode="w+", dtype=code_type, shape=(count, code_width)
+            )
+        for start in range(0, count, 65536):
+            chunk = staged[order[start:start + 65536]]
+            vectors[start:start + 65536] = chunk
+            if codes is not None:
+                codes[start:start + 65536] = quantizer.encode(chunk)
+        vectors.flush()
+        if codes is not None:
+            codes.flush()
+        del vectors, staged, codes
+
+        with RecordFile(staging_papers) as source, RecordFileWriter(os.path.join(directory, "papers.rec")) as writer:
+            for row in order:
+                writer.write(source.read_range(int(row), int(row) + 1)[0])
+
+        np.save(os.path.join(directory, "centroids.npy"), centroids)
+        np.save(os.path.join(directory, "offsets.npy"), offsets)
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump({"dim": dim, "count": count, "nlist": nlist, "metric": "cosine", "quantization": quantization}, f)
+
+        for path in (staging_vectors, staging_papers, staging_papers + ".idx"):
+            os.remove(path)
+        return cls(directory)
+
+    @staticmethod
+    def _kmeans(sample: np.ndarray, nlist: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+        nlist = min(nlist, len(sample))
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(nlist):
+                members = sample[labels == cluster]
+                if len(members):
+                    centroids[cluster] = members.mean(axis=0)
+                else:
+                    # Reseed empty clusters so every list stays useful
+                    centroids[cluster] = sample[rng.integers(len(sample))]
+            centroids = _normalize(centroids)
+        return centroids
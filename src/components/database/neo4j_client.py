@@ -1,5 +1,5 @@
-from neo4j import GraphDatabase
-from contextlib import contextmanager
+from neo4j import AsyncGraphDatabase, GraphDatabase
+from contextlib import asynccontextmanager, contextmanager
 
 class Neo4jClient:
     def __init__(self, uri: str, user: str, password: str):
@@ -7,6 +7,7 @@ class Neo4jClient:
         self.user = user
         self.password = password
         self._driver = None
+        self._async_driver = None
 
     @property
     def driver(self):
@@ -14,6 +15,12 @@ class Neo4jClient:
             self._driver = GraphDatabase.driver(self.uri, auth=(self.user, self.password))
         return self._driver
 
+    @property
+    def async_driver(self):
+        if self._async_driver is None:
+            self._async_driver = AsyncGraphDatabase.driver(self.uri, auth=(self.user, self.password))
+        return self._async_driver
+
     @contextmanager
     def session(self):
         session = self.driver.session()
@@ -22,7 +29,20 @@ class Neo4jClient:
         finally:
             session.close()
 
+    @asynccontextmanager
+    async def async_session(self):
+        session = self.async_driver.session()
+        try:
+            yield session
+        finally:
+            await session.close()
+
     def close(self):
         if self._driver:
             self._driver.close()
-            self._driver = None
\ No newline at end of file
+            self._driver = None
+
+    async def aclose(self):
+        if self._async_driver:
+            await self._async_driver.close()
+            self._async_driver = None
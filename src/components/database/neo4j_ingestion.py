@@ -1,9 +1,23 @@
-from typing import List, Dict, Any
+import logging
+import time
+from typing import List, Dict, Any, Optional, Callable, Tuple
+from multiprocessing.util import Finalize
 from neo4j import GraphDatabase
+from retry.api import retry_call
+from src.components.database.record_file import RecordFile
+
+# Per-process state for pool workers, set up once by `init_worker`
+_worker_ingestor: Optional['OptimizedNeo4jIngestor'] = None
+_worker_record_files: Dict[str, RecordFile] = {}
+_worker_retry: Dict[str, Any] = {"tries": 1, "delay": 0, "backoff": 2}
+
+logger = logging.getLogger(__name__)
 
 class OptimizedNeo4jIngestor:
-    def __init__(self, uri: str, user: str, password: str):
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+    def __init__(self, uri: str, user: str, password: str, driver_factory: Optional[Callable[..., Any]] = None):
+        # `driver_factory` lets benchmarks swap in an in-process stand-in for Neo4j
+        factory = driver_factory or GraphDatabase.driver
+        self.driver = factory(uri, auth=(user, password))
 
     def close(self):
         self.driver.close()
@@ -13,25 +27,84 @@ class OptimizedNeo4jIngestor:
             session.run("CREATE CONSTRAINT paper_id IF NOT EXISTS FOR (p:Paper) REQUIRE p.id IS UNIQUE")
             session.run("CREATE CONSTRAINT author_name IF NOT EXISTS FOR (a:Author) REQUIRE a.name IS UNIQUE")
             session.run("CREATE CONSTRAINT category_name IF NOT EXISTS FOR (c:Category) REQUIRE c.name IS UNIQUE")
+            # Range indexes back the date filters in VectorStore.similarity_search
+            session.run("CREATE RANGE INDEX paper_submit_date IF NOT EXISTS FOR (p:Paper) ON (p.submit_date)")
+            session.run("CREATE RANGE INDEX paper_update_date IF NOT EXISTS FOR (p:Paper) ON (p.update_date)")
 
     def ingest_batch(self, batch: List[Dict[str, Any]]):
         with self.driver.session() as session:
             session.execute_write(self._create_and_link_batch, batch)
 
+    def create_authors(self, names: List[str]):
+        with self.driver.session() as session:
+            session.execute_write(self._create_named_nodes, "Author", names)
+
+    def create_categories(self, names: List[str]):
+        with self.driver.session() as session:
+            session.execute_write(self._create_named_nodes, "Category", names)
+
+    def ingest_papers(self, batch: List[Dict[str, Any]]):
+        """Create or update Paper nodes only, without touching Author or Category nodes."""
+        with self.driver.session() as session:
+            session.execute_write(self._create_papers, batch)
+
+    def link_authors(self, pairs: List[Dict[str, str]]):
+        """Create AUTHORED_BY relationships between existing Paper and Author nodes."""
+        with self.driver.session() as session:
+            session.execute_write(self._link, "Author", "AUTHORED_BY", pairs)
+
+    def link_categories(self, pairs: List[Dict[str, str]]):
+        """Create BELONGS_TO relationships between existing Paper and Category nodes."""
+        with self.driver.session() as session:
+            session.execute_write(self._link, "Category", "BELONGS_TO", pairs)
+
+    def _create_named_nodes(self, tx, label: str, names: List[str]):
+        tx.run(f"UNWIND $names AS name MERGE (:{label} {{name: name}})", names=names)
+
+    def _create_papers(self, tx, batch: List[Dict[str, Any]]):
+        query = """
+        UNWIND $batch AS paper
+        MERGE (p:Paper {id: paper.id})
+        SET p.title = paper.title, p.abstract = paper.abstract,
+            p.submit_date = paper.submit_date, p.update_date = paper.update_date,
+            p.withdrawn = false, p.ingested_at = timestamp()
+        """
+        tx.run(query, batch=batch)
+
+    def _link(self, tx, label: str, rel_type: str, pairs: List[Dict[str, str]]):
+        query = f"""
+        UNWIND $pairs AS pair
+        MATCH (p:Paper {{id: pair.paper_id}})
+        MATCH (n:{label} {{name: pair.name}})
+        MERGE (p)-[:{rel_type}]->(n)
+        """
+        tx.run(query, pairs=pairs)
+
+    def tombstone_batch(self, paper_ids: List[str]):
+        with self.driver.session() as session:
+            session.execute_write(self._tombstone_batch, paper_ids)
+
+    def _tombstone_batch(self, tx, paper_ids: List[str]):
+        query = """
+        UNWIND $ids AS paper_id
+        MATCH (p:Paper {id: paper_id})
+        SET p.withdrawn = true, p.ingested_at = timestamp()
+        """
+        tx.run(query, ids=paper_ids)
+
     def _create_and_link_batch(self, tx, batch: List[Dict[str, Any]]):
         query = """
         UNWIND $batch AS paper
         MERGE (p:Paper {id: paper.id})
         SET p.title = paper.title, p.abstract = paper.abstract, 
-            p.submit_date = paper.submit_date, p.update_date = paper.update_date
-        WITH p, paper
-        UNWIND paper.authors AS author_name
-        MERGE (a:Author {name: author_name})
-        MERGE (p)-[:AUTHORED_BY]->(a)
-        WITH p, paper
-        UNWIND paper.categories AS category_name
-        MERGE (c:Category {name: category_name})
-        MERGE (p)-[:BELONGS_TO]->(c)
+            p.submit_date = paper.submit_date, p.update_date = paper.update_date,
+            p.withdrawn = false, p.ingested_at = timestamp()
+        FOREACH (author_name IN paper.authors |
+            MERGE (a:Author {name: author_name})
+            MERGE (p)-[:AUTHORED_BY]->(a))
+        FOREACH (category_name IN paper.categories |
+            MERGE (c:Category {name: category_name})
+            MERGE (p)-[:BELONGS_TO]->(c))
         """
         tx.run(query, batch=batch)
 
@@ -42,3 +115,70 @@ def worker(uri: str, user: str, password: str, batch: List[Dict[str, Any]]):
         ingestor.ingest_batch(batch)
     finally:
         ingestor.close()
+
+
+def init_worker(
+        uri: str,
+        user: str,
+        password: str,
+        retries: int = 0,
+        retry_delay: float = 1.0,
+        driver_factory: Optional[Callable[..., Any]] = None
+):
+    """
+    Pool initializer: open one driver that lives as long as the worker process.
+
+    Each batch is attempted `retries + 1` times, waiting `retry_delay` seconds
+    before the first retry and doubling the wait after each further failure.
+    """
+    global _worker_ingestor
+    _worker_ingestor = OptimizedNeo4jIngestor(uri, user, password, driver_factory)
+    _worker_retry.update(tries=retries + 1, delay=retry_delay)
+    # atexit does not run in pool workers; multiprocessing finalizers do
+    Finalize(None, _close_worker, exitpriority=10)
+
+
+def _close_worker():
+    global _worker_ingestor
+    for records in _worker_record_files.values():
+        records.close()
+    _worker_record_files.clear()
+    if _worker_ingestor is not None:
+        _worker_ingestor.close()
+        _worker_ingestor = None
+
+
+def _run_with_retry(method: Callable[[List[Any]], None], rows: List[Any]) -> Tuple[int, float]:
+    """Run `method` on `rows` and return the row count and the successful attempt's latency."""
+    def attempt():
+        start_time = time.time()
+        method(rows)
+        return time.time() - start_time
+
+    latency = retry_call(attempt, logger=logger, **_worker_retry)
+    return len(rows), latency
+
+
+def ingest_in_worker(batch: List[Dict[str, Any]]) -> Tuple[int, float]:
+    """Ingest a batch on the worker's long-lived driver and return its size and commit latency."""
+    return _run_with_retry(_worker_ingestor.ingest_batch, batch)
+
+
+def ingest_papers_in_worker(batch: List[Dict[str, Any]]) -> Tuple[int, float]:
+    return _run_with_retry(_worker_ingestor.ingest_papers, batch)
+
+
+def link_authors_in_worker(pairs: List[Dict[str, str]]) -> Tuple[int, float]:
+    return _run_with_retry(_worker_ingestor.link_authors, pairs)
+
+
+def link_categories_in_worker(pairs: List[Dict[str, str]]) -> Tuple[int, float]:
+    return _run_with_retry(_worker_ingestor.link_categories, pairs)
+
+
+def ingest_range_in_worker(path: str, start: int, end: int) -> Tuple[int, float]:
+    """Ingest rows [start, end) of a record file, read from the worker's own memory map."""
+    records = _worker_record_files.get(path)
+    if records is None:
+        records = _worker_record_files[path] = RecordFile(path)
+    return ingest_in_worker(records.read_range(start, end))
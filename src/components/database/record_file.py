@@ -0,0 +1,111 @@
+import json
+import mmap
+import os
+from array import array
+from typing import Any, Dict, Iterator, List
+
+INDEX_MAGIC = b'PAPERIX1'
+INDEX_SUFFIX = '.idx'
+RECORD_SUFFIX = '.rec'
+
+
+class RecordFileWriter:
+    """
+    Append-only writer for the compact intermediate format between preprocess and ingest.
+
+    Records are stored back to back as compact UTF-8 JSON in `<path>`, and
+    `<path>.idx` holds a magic header followed by `count + 1` little-endian
+    uint64 offsets so any row range can be located without scanning.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._data = open(path, 'wb')
+        self._offsets = array('Q', [0])
+
+    def write(self, record: Dict[str, Any]):
+        payload = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self._data.write(payload)
+        self._offsets.append(self._offsets[-1] + len(payload))
+
+    def close(self):
+        self._data.close()
+        offsets = self._offsets
+        if offsets.itemsize != 8:
+            raise RuntimeError("array('Q') is not 64-bit on this platform")
+        with open(self.path + INDEX_SUFFIX, 'wb') as f:
+            f.write(INDEX_MAGIC)
+            f.write(offsets.tobytes())
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __enter__(self) -> 'RecordFileWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class RecordFile:
+    """
+    Memory-mapped reader for files written by `RecordFileWriter`.
+
+    Both the data and the offset index are mapped rather than read, so opening
+    a multi-GB file is cheap and each process only pages in the rows it touches.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._index_file = open(path + INDEX_SUFFIX, 'rb')
+        self._index_map = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._index_map[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            self.close()
+            raise ValueError(f"{path}{INDEX_SUFFIX} is not a paper record index")
+        self._offsets = memoryview(self._index_map)[len(INDEX_MAGIC):].cast('Q')
+
+        self._data_file = open(path, 'rb')
+        # mmap cannot map an empty file
+        if os.path.getsize(path) > 0:
+            self._data_map = mmap.mmap(self._data_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._data = memoryview(self._data_map)
+        else:
+            self._data_map = None
+            self._data = memoryview(b'')
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def iter_range(self, start: int, end: int) -> Iterator[Dict[str, Any]]:
+        """Decode the rows in [start, end) straight from the mapped buffer."""
+        end = min(end, len(self))
+        offsets = self._offsets
+        data = self._data
+        for i in range(start, end):
+            with data[offsets[i]:offsets[i + 1]] as row:
+                yield json.loads(str(row, 'utf-8'))
+
+    def read_range(self, start: int, end: int) -> List[Dict[str, Any]]:
+        return list(self.iter_range(start, end))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.iter_range(0, len(self))
+
+    def close(self):
+        # Views must be released before their maps can be closed
+        for name in ('_offsets', '_data'):
+            view = getattr(self, name, None)
+            if view is not None:
+                view.release()
+                setattr(self, name, None)
+        for name in ('_index_map', '_data_map', '_index_file', '_data_file'):
+            handle = getattr(self, name, None)
+            if handle is not None:
+                handle.close()
+                setattr(self, name, None)
+
+    def __enter__(self) -> 'RecordFile':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
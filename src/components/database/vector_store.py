@@ -1,28 +1,534 @@
-from langchain_community.vectorstores import Neo4jVector
 from src.components.database.neo4j_client import Neo4jClient
-from typing import List, Tuple, Optional
+from src.components.database.local_vector_index import IVFIndex
+from src.utils.ttl_cache import TTLCache
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple, Optional
+import asyncio
+import re
+import time
+
+LUCENE_SPECIAL = re.compile(r'([+\-!(){}\[\]^"~*?:\\/&|])')
+
+# Per-hit enrichment and neighbourhood expansion, shared by every way of producing the hits.
+# Related papers are weighted Adamic-Adar style: each shared author or category contributes
+# 1 / log(degree). Authors with more than $max_author_degree papers (large collaborations)
+# are skipped as uninformative. Categories are never skipped, since every arXiv category
+# has many thousands of papers; their low weight ranks them below shared authors, and each
+# shared node contributes at most $fanout candidates, so the cost per hit stays bounded.
+GRAPH_EXPANSION = """
+CALL {
+    WITH p
+    OPTIONAL MATCH (p)-[:AUTHORED_BY]->(a:Author)
+    RETURN collect(DISTINCT a.name) AS authors
+}
+CALL {
+    WITH p
+    OPTIONAL MATCH (p)-[:BELONGS_TO]->(c:Category)
+    RETURN collect(DISTINCT c.name) AS categories
+}
+CALL {
+    WITH p
+    MATCH (p)-[:AUTHORED_BY|BELONGS_TO]->(shared)
+    WITH p, shared, COUNT { (shared)<-[:AUTHORED_BY|BELONGS_TO]-() } AS degree
+    WHERE 1 < degree AND (shared:Category OR degree <= $max_author_degree)
+    CALL {
+        WITH p, shared
+        MATCH (shared)<-[:AUTHORED_BY|BELONGS_TO]-(r:Paper)
+        WHERE r <> p AND NOT coalesce(r.withdrawn, false)
+        RETURN r
+        LIMIT $fanout
+    }
+    WITH r, sum(1.0 / log(degree)) AS weight
+    ORDER BY weight DESC
+    LIMIT $expand
+    RETURN collect({id: r.id, title: r.title, weight: weight}) AS related
+}
+RETURN p.id AS id, p.title AS title, p.abstract AS abstract, score, authors, categories, related
+ORDER BY score DESC
+"""
+
+# Tombstoned papers stay in the graph (and its indexes) with `withdrawn = true`; every read skips them
+NOT_WITHDRAWN = "NOT coalesce(p.withdrawn, false)"
+
+# Withdrawn papers are still in the vector index, so unfiltered searches over-fetch
+# `2k + TOMBSTONE_SLACK` neighbours and keep the best k that are not withdrawn
+TOMBSTONE_SLACK = 10
+VECTOR_CANDIDATES = f"""
+CALL db.index.vector.queryNodes($index_name, $k * 2 + {TOMBSTONE_SLACK}, $embedding)
+YIELD node AS p, score
+WHERE {NOT_WITHDRAWN}
+WITH p, score
+ORDER BY score DESC
+LIMIT $k
+"""
+
+# Unfiltered top-k straight from the vector index, returning the paper id with every hit
+VECTOR_SEARCH = VECTOR_CANDIDATES + """RETURN p.id AS id, p.abstract AS abstract, score
+"""
+
+# Graph expansion of hits found outside Cypher (local index or filtered search), passed in by id
+GRAPH_EXPANSION_BY_ID = """
+UNWIND $hits AS hit
+MATCH (p:Paper {id: hit.id})
+WHERE """ + NOT_WITHDRAWN + """
+WITH p, hit.score AS score
+""" + GRAPH_EXPANSION
+
+
+@dataclass
+class SearchFilter:
+    """
+    Metadata restrictions for `VectorStore` searches. Empty fields do not
+    filter; several values in one field match any of them. Dates are
+    inclusive ISO `YYYY-MM-DD` bounds on `Paper.submit_date`.
+    """
+    categories: List[str] = field(default_factory=list)
+    authors: List[str] = field(default_factory=list)
+    submitted_from: Optional[str] = None
+    submitted_to: Optional[str] = None
+
+    def is_empty(self) -> bool:
+        return not (self.categories or self.authors or self.submitted_from or self.submitted_to)
+
+    def params(self) -> Dict[str, Any]:
+        return {
+            "categories": self.categories,
+            "authors": self.authors,
+            "submitted_from": self.submitted_from,
+            "submitted_to": self.submitted_to,
+        }
+
+    def date_predicates(self) -> List[str]:
+        predicates = []
+        if self.submitted_from:
+            predicates.append("p.submit_date >= $submitted_from")
+        if self.submitted_to:
+            predicates.append("p.submit_date <= $submitted_to")
+        return predicates
+
 
 class VectorStore:
-    def __init__(self, neo4j_client: Neo4jClient, embedding_model, index_name: str):
+    """
+    Similarity search over paper abstracts.
+
+    `backend="neo4j"` queries Neo4j's `index_name` vector index directly;
+    `backend="local"` searches an `IVFIndex` memory-mapped from
+    `local_index_dir` (see `scripts/build_vector_index.py`) without a network
+    round trip. Both return the same scores, and hits from either carry the
+    paper id so graph details can still be fetched from Neo4j.
+
+    Query embeddings are kept in an LRU cache with a TTL, so repeated
+    questions skip the embedding request entirely.
+
+    `hybrid_search` adds BM25 keyword search over the `fulltext_index_name`
+    fulltext index (title and abstract), run concurrently with the vector
+    search and merged by reciprocal rank fusion.
+
+    A `SearchFilter` is pushed into the Cypher query instead of post-filtering
+    the global top-k: the candidate set is reached from the matching
+    `Author`/`Category` nodes or the `submit_date` range index, and only those
+    papers are scored, so every returned hit satisfies the filter.
+
+    The `a`-prefixed methods are native async variants over the async Neo4j
+    driver and `aembed_documents`, for callers serving many sessions from one
+    event loop. They share their Cypher with the synchronous methods.
+    """
+
+    def __init__(
+            self,
+            neo4j_client: Neo4jClient,
+            embedding_model,
+            index_name: str,
+            backend: str = "neo4j",
+            local_index_dir: Optional[str] = None,
+            nprobe: int = 16,
+            rerank: int = 4,
+            query_cache_size: int = 1024,
+            query_cache_ttl: Optional[float] = 3600.0,
+            max_concurrency: int = 8,
+            fulltext_index_name: str = "paper_fulltext_index"
+    ):
         self.client = neo4j_client
         self.embedding_model = embedding_model
         self.index_name = index_name
-        self.vector_store = self._initialize_vector_store()
-
-    def _initialize_vector_store(self) -> Neo4jVector:
-        return Neo4jVector(
-            embedding=self.embedding_model,
-            url=self.client.uri,
-            username=self.client.user,
-            password=self.client.password,
-            index_name=self.index_name,
-            node_label="Paper",
-            text_node_property="abstract"
-        )
-
-    def similarity_search(self, query: str, k: int = 3) -> List[Tuple[str, float]]:
+        self.backend = backend
+        self.query_cache = TTLCache(max_size=query_cache_size, ttl=query_cache_ttl)
+        self.max_concurrency = max_concurrency
+        self.fulltext_index_name = fulltext_index_name
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self.local_index = None
+        if backend == "local":
+            if not local_index_dir:
+                raise ValueError("The local vector backend requires a local index directory")
+            self.local_index = IVFIndex(local_index_dir, nprobe=nprobe, rerank=rerank)
+        elif backend != "neo4j":
+            raise ValueError(f"Unknown vector backend: {backend}")
+
+    def similarity_search(
+            self,
+            query: str,
+            k: int = 3,
+            search_filter: Optional[SearchFilter] = None
+    ) -> List[Tuple[str, float]]:
+        return [(content, score) for _, content, score in self.similarity_search_with_ids(query, k, search_filter)]
+
+    def similarity_search_with_ids(
+            self,
+            query: str,
+            k: int = 3,
+            search_filter: Optional[SearchFilter] = None
+    ) -> List[Tuple[str, str, float]]:
+        """Return `(paper_id, abstract, score)` for the `k` closest papers."""
+        try:
+            return self._search_by_vector(self.embed_queries([query])[0], k, search_filter)
+        except Exception as e:
+            raise ValueError(f"Error performing similarity search: {str(e)}")
+
+    def similarity_search_batch(
+            self,
+            queries: List[str],
+            k: int = 3,
+            search_filter: Optional[SearchFilter] = None
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Search many queries at once: uncached queries are embedded in a single
+        request and the searches run concurrently on a thread pool.
+        """
+        try:
+            vectors = self.embed_queries(queries)
+            results = list(self.executor.map(lambda vector: self._search_by_vector(vector, k, search_filter), vectors))
+            return [[(content, score) for _, content, score in hits] for hits in results]
+        except Exception as e:
+            raise ValueError(f"Error performing batch similarity search: {str(e)}")
+
+    def keyword_search(
+            self,
+            query: str,
+            k: int = 3,
+            search_filter: Optional[SearchFilter] = None
+    ) -> List[Tuple[str, str, float]]:
+        """BM25 search over paper titles and abstracts, as `(paper_id, abstract, score)`."""
+        cypher, params = self._keyword_query(query, k, search_filter)
+        with self.client.session() as session:
+            records = session.run(cypher, **params)
+            return [(record["id"], record["abstract"], record["score"]) for record in records]
+
+    async def akeyword_search(
+            self,
+            query: str,
+            k: int = 3,
+            search_filter: Optional[SearchFilter] = None
+    ) -> List[Tuple[str, str, float]]:
+        cypher, params = self._keyword_query(query, k, search_filter)
+        records = await self._arun(cypher, **params)
+        return [(record["id"], record["abstract"], record["score"]) for record in records]
+
+    def _keyword_query(
+            self,
+            query: str,
+            k: int,
+            search_filter: Optional[SearchFilter] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        predicates = [NOT_WITHDRAWN]
+        params = {}
+        if search_filter is not None and not search_filter.is_empty():
+            params = search_filter.params()
+            predicates += search_filter.date_predicates()
+            if search_filter.categories:
+                predicates.append("EXISTS { (p)-[:BELONGS_TO]->(c:Category) WHERE c.name IN $categories }")
+            if search_filter.authors:
+                predicates.append("EXISTS { (p)-[:AUTHORED_BY]->(a:Author) WHERE a.name IN $authors }")
+        cypher = f"""
+        CALL db.index.fulltext.queryNodes($index_name, $query)
+        YIELD node AS p, score
+        WHERE {' AND '.join(predicates)}
+        RETURN p.id AS id, p.abstract AS abstract, score
+        ORDER BY score DESC
+        LIMIT $k
+        """
+        # Questions routinely contain Lucene operators such as '?' or ':'
+        escaped = LUCENE_SPECIAL.sub(r'\\\1', query)
+        return cypher, {"index_name": self.fulltext_index_name, "query": escaped, "k": k, **params}
+
+    def hybrid_search(
+            self,
+            query: str,
+            k: int = 3,
+            fetch_k: Optional[int] = None,
+            rrf_k: int = 60,
+            search_filter: Optional[SearchFilter] = None
+    ) -> Tuple[List[Tuple[str, str, float]], Dict[str, float]]:
+        """
+        Run keyword and vector search concurrently and fuse them by reciprocal rank.
+
+        Each paper scores `sum(1 / (rrf_k + rank))` over the lists it appears
+        in. Returns the top `k` as `(paper_id, abstract, rrf_score)` together
+        with the wall time of each search, so latency stays close to the
+        slower of the two.
+        """
+        fetch_k = fetch_k or max(2 * k, 10)
+
+        def timed(func, *args):
+            start_time = time.time()
+            return func(*args), time.time() - start_time
+
+        try:
+            start_time = time.time()
+            keyword_future = self.executor.submit(timed, self.keyword_search, query, fetch_k, search_filter)
+            vector_future = self.executor.submit(timed, self.similarity_search_with_ids, query, fetch_k, search_filter)
+            keyword_hits, keyword_time = keyword_future.result()
+            vector_hits, vector_time = vector_future.result()
+            return self._fuse(vector_hits, keyword_hits, k, rrf_k), {
+                "keyword_search_time": keyword_time,
+                "vector_search_time": vector_time,
+                "hybrid_search_time": time.time() - start_time,
+                "keyword_hits": len(keyword_hits),
+                "vector_hits": len(vector_hits),
+            }
+        except Exception as e:
+            raise ValueError(f"Error performing hybrid search: {str(e)}")
+
+    async def ahybrid_search(
+            self,
+            query: str,
+            k: int = 3,
+            fetch_k: Optional[int] = None,
+            rrf_k: int = 60,
+            search_filter: Optional[SearchFilter] = None
+    ) -> Tuple[List[Tuple[str, str, float]], Dict[str, float]]:
+        fetch_k = fetch_k or max(2 * k, 10)
+
+        async def timed(coroutine):
+            start_time = time.time()
+            return await coroutine, time.time() - start_time
+
+        try:
+            start_time = time.time()
+            (keyword_hits, keyword_time), (vector_hits, vector_time) = await asyncio.gather(
+                timed(self.akeyword_search(query, fetch_k, search_filter)),
+                timed(self.asimilarity_search_with_ids(query, fetch_k, search_filter))
+            )
+            return self._fuse(vector_hits, keyword_hits, k, rrf_k), {
+                "keyword_search_time": keyword_time,
+                "vector_search_time": vector_time,
+                "hybrid_search_time": time.time() - start_time,
+                "keyword_hits": len(keyword_hits),
+                "vector_hits": len(vector_hits),
+            }
+        except Exception as e:
+            raise ValueError(f"Error performing hybrid search: {str(e)}")
+
+    @staticmethod
+    def _fuse(
+            vector_hits: List[Tuple[str, str, float]],
+            keyword_hits: List[Tuple[str, str, float]],
+            k: int,
+            rrf_k: int
+    ) -> List[Tuple[str, str, float]]:
+        # Both searches return paper ids, so a paper found by both accumulates both terms
+        fused: Dict[str, List] = {}
+        for hits in (vector_hits, keyword_hits):
+            for rank, (paper_id, content, _) in enumerate(hits, start=1):
+                entry = fused.setdefault(paper_id, [paper_id, content, 0.0])
+                entry[2] += 1.0 / (rrf_k + rank)
+        ranked = sorted(fused.values(), key=lambda entry: entry[2], reverse=True)[:k]
+        return [tuple(entry) for entry in ranked]
+
+    def graph_search(
+            self,
+            query: str,
+            k: int = 3,
+            expand: int = 5,
+            max_author_degree: int = 1000,
+            fanout: int = 100,
+            search_filter: Optional[SearchFilter] = None
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Vector search enriched with graph context in a single Cypher round trip.
+
+        Returns the `k` hits as dicts with `id`, `title`, `abstract`, `score`,
+        `authors` and `categories`, and up to `expand` related papers (`id`,
+        `title`, `weight`) that share authors or categories with the hits,
+        ranked by summed edge weight. Each shared author or category offers
+        at most `fanout` candidates; authors with more than
+        `max_author_degree` papers are ignored. On the Neo4j backend the vector query
+        runs inside the same statement; otherwise (local index or filtered
+        search) the hits are passed in by id.
+        """
+        try:
+            vector = self.embed_queries([query])[0]
+            hits = None if self._graph_search_in_cypher(search_filter) else self._search_by_vector(vector, k, search_filter)
+            cypher, params = self._graph_query(vector, hits, k, expand, max_author_degree, fanout)
+            with self.client.session() as session:
+                results = [record.data() for record in session.run(cypher, **params)]
+            return results, self._rank_related(results, expand)
+        except Exception as e:
+            raise ValueError(f"Error performing graph search: {str(e)}")
+
+    async def agraph_search(
+            self,
+            query: str,
+            k: int = 3,
+            expand: int = 5,
+            max_author_degree: int = 1000,
+            fanout: int = 100,
+            search_filter: Optional[SearchFilter] = None
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
         try:
-            results = self.vector_store.similarity_search_with_score(query, k=k)
-            return [(doc.page_content, score) for doc, score in results]
+            vector = (await self.aembed_queries([query]))[0]
+            hits = None
+            if not self._graph_search_in_cypher(search_filter):
+                hits = await self._asearch_by_vector(vector, k, search_filter)
+            cypher, params = self._graph_query(vector, hits, k, expand, max_author_degree, fanout)
+            results = await self._arun(cypher, **params)
+            return results, self._rank_related(results, expand)
+        except Exception as e:
+            raise ValueError(f"Error performing graph search: {str(e)}")
+
+    def _graph_search_in_cypher(self, search_filter: Optional[SearchFilter]) -> bool:
+        return self.local_index is None and (search_filter is None or search_filter.is_empty())
+
+    def _graph_query(
+            self,
+            vector: List[float],
+            hits: Optional[List[Tuple[str, str, float]]],
+            k: int,
+            expand: int,
+            max_author_degree: int,
+            fanout: int
+    ) -> Tuple[str, Dict[str, Any]]:
+        params = {"k": k, "expand": expand, "max_author_degree": max_author_degree, "fanout": fanout}
+        if hits is None:
+            cypher = VECTOR_CANDIDATES + GRAPH_EXPANSION
+            params.update(index_name=self.index_name, embedding=list(vector))
+        else:
+            cypher = GRAPH_EXPANSION_BY_ID
+            params["hits"] = [{"id": paper_id, "score": score} for paper_id, _, score in hits]
+        return cypher, params
+
+    @staticmethod
+    def _rank_related(results: List[Dict[str, Any]], expand: int) -> List[Dict[str, Any]]:
+        hit_ids = {hit["id"] for hit in results}
+        related: Dict[str, Dict[str, Any]] = {}
+        for hit in results:
+            for paper in hit.pop("related"):
+                if paper["id"] in hit_ids:
+                    continue
+                entry = related.setdefault(paper["id"], {"id": paper["id"], "title": paper["title"], "weight": 0.0})
+                entry["weight"] += paper["weight"]
+        return sorted(related.values(), key=lambda paper: paper["weight"], reverse=True)[:expand]
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed queries through the cache, sending all misses in one embedding request."""
+        vectors = [self.query_cache.get(query) for query in queries]
+        missing = list(dict.fromkeys(query for query, vector in zip(queries, vectors) if vector is None))
+        if missing:
+            computed = dict(zip(missing, self.embedding_model.embed_documents(missing)))
+            for query, vector in computed.items():
+                self.query_cache.put(query, vector)
+            vectors = [computed[query] if vector is None else vector for query, vector in zip(queries, vectors)]
+        return vectors
+
+    def _search_by_vector(
+            self,
+            vector: List[float],
+            k: int,
+            search_filter: Optional[SearchFilter] = None
+    ) -> List[Tuple[str, str, float]]:
+        if search_filter is not None and not search_filter.is_empty():
+            # The local index holds no graph metadata, so filtered searches always run in Neo4j
+            return self._filtered_search(vector, k, search_filter)
+        if self.local_index is not None:
+            results = []
+            for row, score in self.local_index.search(vector, k=k):
+                paper = self.local_index.paper(row)
+                results.append((paper["id"], paper["abstract"], score))
+            return results
+        with self.client.session() as session:
+            records = session.run(VECTOR_SEARCH, index_name=self.index_name, embedding=list(vector), k=k)
+            return [(record["id"], record["abstract"], record["score"]) for record in records]
+
+    def _filtered_search(
+            self,
+            vector: List[float],
+            k: int,
+            search_filter: SearchFilter
+    ) -> List[Tuple[str, str, float]]:
+        with self.client.session() as session:
+            records = session.run(self._filtered_query(search_filter), embedding=list(vector), k=k, **search_filter.params())
+            return [(record["id"], record["abstract"], record["score"]) for record in records]
+
+    @staticmethod
+    def _filtered_query(search_filter: SearchFilter) -> str:
+        """Score only the papers matching the filter, starting from its most selective anchor."""
+        predicates = ["p.embedding IS NOT NULL", NOT_WITHDRAWN] + search_filter.date_predicates()
+        lines = []
+        if search_filter.authors:
+            lines.append("MATCH (a:Author)<-[:AUTHORED_BY]-(p:Paper) WHERE a.name IN $authors")
+        if search_filter.categories:
+            paper = "(p)" if lines else "(p:Paper)"
+            lines.append(f"MATCH {paper}-[:BELONGS_TO]->(c:Category) WHERE c.name IN $categories")
+        if lines:
+            lines.append(f"WITH DISTINCT p WHERE {' AND '.join(predicates)}")
+        else:
+            # Date-only filters seek the paper_submit_date range index directly
+            lines.append(f"MATCH (p:Paper) WHERE {' AND '.join(predicates)}")
+        lines.append("""
+        WITH p, vector.similarity.cosine(p.embedding, $embedding) AS score
+        ORDER BY score DESC
+        LIMIT $k
+        RETURN p.id AS id, p.abstract AS abstract, score
+        """)
+        return "\n".join(lines)
+
+    async def aembed_queries(self, queries: List[str]) -> List[List[float]]:
+        vectors = [self.query_cache.get(query) for query in queries]
+        missing = list(dict.fromkeys(query for query, vector in zip(queries, vectors) if vector is None))
+        if missing:
+            computed = dict(zip(missing, await self.embedding_model.aembed_documents(missing)))
+            for query, vector in computed.items():
+                self.query_cache.put(query, vector)
+            vectors = [computed[query] if vector is None else vector for query, vector in zip(queries, vectors)]
+        return vectors
+
+    async def asimilarity_search_with_ids(
+            self,
+            query: str,
+            k: int = 3,
+            search_filter: Optional[SearchFilter] = None
+    ) -> List[Tuple[str, str, float]]:
+        try:
+            return await self._asearch_by_vector((await self.aembed_queries([query]))[0], k, search_filter)
         except Exception as e:
             raise ValueError(f"Error performing similarity search: {str(e)}")
+
+    async def _asearch_by_vector(
+            self,
+            vector: List[float],
+            k: int,
+            search_filter: Optional[SearchFilter] = None
+    ) -> List[Tuple[str, str, float]]:
+        if search_filter is not None and not search_filter.is_empty():
+            cypher = self._filtered_query(search_filter)
+            params = {"embedding": list(vector), "k": k, **search_filter.params()}
+        elif self.local_index is not None:
+            # Scanning the memory-mapped index is CPU work, so keep it off the event loop
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, self._search_by_vector, vector, k, None
+            )
+        else:
+            cypher = VECTOR_SEARCH
+            params = {"index_name": self.index_name, "embedding": list(vector), "k": k}
+        records = await self._arun(cypher, **params)
+        return [(record["id"], record["abstract"], record["score"]) for record in records]
+
+    async def _arun(self, cypher: str, **params) -> List[Dict[str, Any]]:
+        async with self.client.async_session() as session:
+            result = await session.run(cypher, **params)
+            return await result.data()
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        if self.local_index is not None:
+            self.local_index.close()
@@ -0,0 +1,177 @@
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Optional
+
+from src.components.evaluation.experiment_tracker import ExperimentTracker
+from src.components.evaluation.opik_evaluator import LlmEvaluator
+
+_STOP = object()
+
+
+class BackgroundEvaluator:
+    """
+    Run the LLM-judge evaluations of answers on a bounded pool of worker threads.
+
+    `submit` only enqueues the answer, so the judge round trips no longer sit
+    between the user and the next message. At most `queue_size` answers wait
+    for a worker. Answers submitted while the queue is full are dropped
+    (`overflow="drop"`) or appended to the JSON Lines file `spill_path`
+    (`overflow="spill"`) so they can still be evaluated offline. Results are
+    logged to the `ExperimentTracker` from the workers, and `close` waits for
+    the queue to drain, or up to its timeout, after which the evaluations
+    still queued are abandoned and counted.
+    """
+
+    def __init__(
+        self,
+        llm_evaluator: LlmEvaluator,
+        experiment_tracker: ExperimentTracker,
+        workers: int = 2,
+        queue_size: int = 100,
+        overflow: str = "drop",
+        spill_path: Optional[str] = None
+    ):
+        if overflow not in ("drop", "spill"):
+            raise ValueError(f"Unknown evaluation overflow policy: {overflow}")
+        if overflow == "spill" and not spill_path:
+            raise ValueError("The spill overflow policy requires a spill path")
+        self.llm_evaluator = llm_evaluator
+        self.experiment_tracker = experiment_tracker
+        self.overflow = overflow
+        self.spill_path = spill_path
+        self.logger = logging.getLogger(__name__)
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._closed = False
+        # Set when `close` runs out of time: workers stop taking jobs and the rest are abandoned
+        self._abandon = threading.Event()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.abandoned = 0
+        # Daemon threads, so a hung judge call cannot keep the process alive; `close` is what drains
+        self._workers = [
+            threading.Thread(target=self._work, name=f"evaluation-worker-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, message: str, ai_text: str) -> bool:
+        """Queue an answer for evaluation; returns False if the overflow policy had to apply."""
+        job = {"message": message, "ai_text": ai_text, "submitted_at": time.time()}
+        with self._lock:
+            if self._closed:
+                return False
+            self.submitted += 1
+        try:
+            self._queue.put_nowait(job)
+            return True
+        except queue.Full:
+            pass
+        if self.overflow == "spill":
+            self._spill(job)
+        else:
+            with self._lock:
+                self.dropped += 1
+            self.logger.warning("Evaluation queue full, dropping evaluation")
+        self.experiment_tracker.experiment.log_metrics(self.stats())
+        return False
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "evaluations_submitted": self.submitted,
+                "evaluations_completed": self.completed,
+                "evaluations_failed": self.failed,
+                "evaluations_dropped": self.dropped,
+                "evaluations_spilled": self.spilled,
+                "evaluations_abandoned": self.abandoned,
+                "evaluation_queue_depth": self._queue.qsize(),
+            }
+
+    def close(self, timeout: Optional[float] = None):
+        """Stop accepting answers and wait until every queued evaluation has been logged, or `timeout` passes."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def remaining() -> Optional[float]:
+            return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+        try:
+            for _ in self._workers:
+                # The stop markers queue up behind the pending evaluations; a full queue waits only until the deadline
+                self._queue.put(_STOP, timeout=remaining())
+        except queue.Full:
+            self._abandon.set()
+        for worker in self._workers:
+            worker.join(remaining())
+        if any(worker.is_alive() for worker in self._workers):
+            self._abandon.set()
+        if not self._abandon.is_set():
+            return
+        # Each job is taken off the queue exactly once, here or by a worker, and counted there
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not _STOP:
+                with self._lock:
+                    self.abandoned += 1
+        self.logger.warning(f"Evaluation shutdown timed out; abandoned {self.abandoned} queued evaluations")
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                return
+            if self._abandon.is_set():
+                with self._lock:
+                    self.abandoned += 1
+                return
+            try:
+                self._evaluate(job)
+                with self._lock:
+                    self.completed += 1
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                self.logger.error(f"Background evaluation failed: {str(e)}")
+
+    def _evaluate(self, job: Dict[str, str]):
+        message, ai_text = job["message"], job["ai_text"]
+        # Hallucination score
+        hallucination_score = self.llm_evaluator.check_hallucination(message, ai_text)
+        # Moderation score
+        moderation_score = self.llm_evaluator.check_moderation(ai_text)
+        # Evaluate references (Contains, Equals, LevenshteinRatio)
+        metric_scores = self.llm_evaluator.evaluate(ai_text)
+        # Answer relevance
+        relevance_score = self.llm_evaluator.check_answer_relevance(input_text=message, output_text=ai_text)
+        # GEval metric
+        g_eval_score = self.llm_evaluator.check_g_eval(output_text=ai_text)
+
+        self.experiment_tracker.log_evaluation(
+            hallucination_score,
+            moderation_score,
+            metric_scores,
+            relevance_score,
+            g_eval_score,
+            evaluation_delay=time.time() - job["submitted_at"]
+        )
+        self.logger.info(f"Answer Relevance score: {relevance_score}")
+
+    def _spill(self, job: Dict[str, str]):
+        with self._lock:
+            with open(self.spill_path, "a", encoding="utf-8") as spill:
+                spill.write(json.dumps(job) + "\n")
+            self.spilled += 1
@@ -84,6 +84,49 @@ class ExperimentTracker:
             f"hourly_avg_latency_{hour}": metrics.processing_time
         })
 
+    def log_retrieval_timings(self, metrics: Dict[str, Any]):
+        """Log the per-search timings, hit counts and context packing stats reported by `RAG.get_context`."""
+        keys = ("retrieval_time", "keyword_search_time", "vector_search_time", "hybrid_search_time",
+                "keyword_hits", "vector_hits", "related_papers", "context_tokens", "duplicate_chunks",
+                "truncated_chunks", "dropped_chunks", "time_to_first_token", "prefetched", "prefetch_wait_time")
+        timings = {f"rag_{key}": metrics[key] for key in keys if key in metrics}
+        if timings:
+            self.experiment.log_metrics(timings)
+
+    def log_answer_cache(self, metrics: Dict[str, Any], cache_stats: Dict[str, float]):
+        """Log whether a RAG answer came from the semantic cache, plus running cache totals."""
+        if "answer_cache_hit" not in metrics:
+            return
+        values = {"answer_cache_hit": int(metrics["answer_cache_hit"]), **cache_stats}
+        if "answer_cache_similarity" in metrics:
+            values["answer_cache_similarity"] = metrics["answer_cache_similarity"]
+        self.experiment.log_metrics(values)
+
+    def log_fast_path(self, routed: bool, router_stats: Dict[str, float]):
+        """Log whether a message skipped the agent, plus running fast-path totals."""
+        self.experiment.log_metrics({"fast_path": int(routed), **router_stats})
+
+    def log_evaluation(
+        self,
+        hallucination_score: float,
+        moderation_score: float,
+        metric_scores: Dict[str, Any],
+        answer_relevance_score: float,
+        g_eval_score: float,
+        evaluation_delay: Optional[float] = None
+    ):
+        """Log the LLM-judge scores of one answer, plus how long after the answer they were computed."""
+        values = {
+            "hallucination_score": hallucination_score,
+            "moderation_score": moderation_score,
+            "g_eval_score": g_eval_score,
+            "answer_relevance_score": answer_relevance_score,
+        }
+        values.update({metric_name: score_result.value for metric_name, score_result in metric_scores.items()})
+        if evaluation_delay is not None:
+            values["evaluation_delay"] = evaluation_delay
+        self.experiment.log_metrics(values)
+
     def log_session_metrics(self):
         """Log overall session metrics."""
         session_duration = time.time() - self.start_time
@@ -26,42 +26,30 @@ class PaperTool:
             with self.db_client.session() as session:
                 result = session.run(self._get_paper_query(), paper_id=paper_id)
                 record = result.single()
+            return self._paper_response(record, paper_id, start_time)
 
-                if not record:
-                    self.logger.info(f"No paper found with ID {paper_id}")
-                    return {
-                        "response": f"Paper with ID {paper_id} not found.",
-                        "success": False,
-                        "metrics": {
-                            "error": "Paper not found",
-                            "success": False,
-                            "processing_time": time.time() - start_time,
-                            "question_length": len(paper_id)
-                        }
-                    }
-
-                # Create paper object
-                paper = Paper.from_db_record(record)
-                paper_text = paper.to_string()
+        except AuthError as e:
+            error_msg = f"Authentication failed: {str(e)}"
+            self.logger.error(f"Authentication error during paper lookup: {str(e)}")
+            return self._create_error_response(error_msg, start_time, paper_id)
+        except ServiceUnavailable as e:
+            error_msg = f"Database service unavailable: {str(e)}"
+            self.logger.error(f"Service unavailable during paper lookup: {str(e)}")
+            return self._create_error_response(error_msg, start_time, paper_id)
+        except Exception as e:
+            error_msg = f"Error retrieving paper: {str(e)}"
+            self.logger.error(f"Error during paper lookup: {str(e)}")
+            return self._create_error_response(error_msg, start_time, paper_id)
 
-                # Collect metrics
-                paper_stats = self.metrics_collector.get_text_stats(paper_text)
-                metrics = {
-                    "success": True,
-                    "processing_time": time.time() - start_time,
-                    "response_length": len(paper_text),
-                    "response_tokens": paper_stats["token_count"],
-                    "word_count": paper_stats["word_count"],
-                    "authors_count": len(record["authors"]),
-                    "categories_count": len(record["categories"]),
-                    "question_length": len(paper_id)
-                }
+    async def afind_paper_by_id(self, paper_id: str) -> Dict[str, Any]:
+        """Async variant of `find_paper_by_id` on the async driver, without the separate connection test."""
+        start_time = time.time()
 
-                return {
-                    "response": paper_text,
-                    "success": True,
-                    "metrics": metrics
-                }
+        try:
+            async with self.db_client.async_session() as session:
+                result = await session.run(self._get_paper_query(), paper_id=paper_id)
+                record = await result.single()
+            return self._paper_response(record, paper_id, start_time)
 
         except AuthError as e:
             error_msg = f"Authentication failed: {str(e)}"
@@ -76,6 +64,43 @@ class PaperTool:
             self.logger.error(f"Error during paper lookup: {str(e)}")
             return self._create_error_response(error_msg, start_time, paper_id)
 
+    def _paper_response(self, record, paper_id: str, start_time: float) -> Dict[str, Any]:
+        if not record:
+            self.logger.info(f"No paper found with ID {paper_id}")
+            return {
+                "response": f"Paper with ID {paper_id} not found.",
+                "success": False,
+                "metrics": {
+                    "error": "Paper not found",
+                    "success": False,
+                    "processing_time": time.time() - start_time,
+                    "question_length": len(paper_id)
+                }
+            }
+
+        # Create paper object
+        paper = Paper.from_db_record(record)
+        paper_text = paper.to_string()
+
+        # Collect metrics
+        paper_stats = self.metrics_collector.get_text_stats(paper_text)
+        metrics = {
+            "success": True,
+            "processing_time": time.time() - start_time,
+            "response_length": len(paper_text),
+            "response_tokens": paper_stats["token_count"],
+            "word_count": paper_stats["word_count"],
+            "authors_count": len(record["authors"]),
+            "categories_count": len(record["categories"]),
+            "question_length": len(paper_id)
+        }
+
+        return {
+            "response": paper_text,
+            "success": True,
+            "metrics": metrics
+        }
+
     def _create_error_response(self, error_msg: str, start_time: float, paper_id: str) -> Dict[str, Any]:
         return {
             "response": error_msg,
@@ -92,6 +117,7 @@ class PaperTool:
         """Return the paper lookup query."""
         return """
         MATCH (p:Paper {id: $paper_id})
+        WHERE NOT coalesce(p.withdrawn, false)
         OPTIONAL MATCH (p)-[:AUTHORED_BY]->(a:Author)
         OPTIONAL MATCH (p)-[:BELONGS_TO]->(c:Category)
         RETURN p.id as id, p.title AS title, p.abstract AS abstract, 
@@ -0,0 +1,185 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from src.components.database.neo4j_client import Neo4jClient
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    paper_ids: List[str]
+    embedding: np.ndarray
+    created_at: float
+    similarity: float = 1.0
+    # `Paper.ingested_at` of every cited paper when the answer was stored
+    versions: Dict[str, Optional[int]] = field(default_factory=dict)
+
+
+class SemanticAnswerCache:
+    """
+    LRU + TTL cache of RAG answers, looked up by question-embedding cosine similarity.
+
+    A lookup returns the closest cached answer whose similarity reaches
+    `threshold`. Each entry remembers the papers its context came from and
+    their `Paper.ingested_at` when it was stored. At most every
+    `refresh_interval` seconds the cache reads the current `ingested_at` of
+    those papers (a lookup by id, bounded by the cache size) and drops every
+    entry for which one of them differs. Comparing values instead of keeping
+    a time watermark is immune to clock skew and to ingestion batches that
+    commit out of order.
+    """
+
+    def __init__(
+        self,
+        db_client: Optional[Neo4jClient] = None,
+        max_size: int = 1000,
+        ttl: Optional[float] = 3600.0,
+        threshold: float = 0.95,
+        refresh_interval: float = 30.0
+    ):
+        self.db_client = db_client
+        self.max_size = max_size
+        self.ttl = ttl
+        self.threshold = threshold
+        self.refresh_interval = refresh_interval
+        self.logger = logging.getLogger(__name__)
+        self._entries: 'OrderedDict[int, CachedAnswer]' = OrderedDict()
+        self._by_paper: Dict[str, Set[int]] = {}
+        self._next_key = 0
+        self._lock = threading.Lock()
+        self._refreshed_at = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _normalize(embedding: Iterable[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, embedding: Iterable[float]) -> Optional[CachedAnswer]:
+        self._maybe_refresh()
+        query = self._normalize(embedding)
+        with self._lock:
+            self._expire()
+            if not self._entries:
+                self.misses += 1
+                return None
+            keys = list(self._entries.keys())
+            similarities = np.stack([self._entries[key].embedding for key in keys]) @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+            key = keys[best]
+            self._entries.move_to_end(key)
+            self.hits += 1
+            entry = self._entries[key]
+            entry.similarity = float(similarities[best])
+            return entry
+
+    def put(self, question: str, embedding: Iterable[float], answer: str, paper_ids: List[str]):
+        entry = CachedAnswer(question, answer, list(paper_ids), self._normalize(embedding), time.monotonic())
+        if self.db_client is not None:
+            try:
+                entry.versions = self._fetch_versions(entry.paper_ids)
+            except Exception as e:
+                # Without the versions the entry could never be invalidated, so it is not cached
+                self.logger.warning(f"Answer cache could not read paper versions: {str(e)}")
+                return
+        with self._lock:
+            key = self._next_key
+            self._next_key += 1
+            self._entries[key] = entry
+            for paper_id in entry.paper_ids:
+                self._by_paper.setdefault(paper_id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_papers(self, paper_ids: Iterable[str]) -> int:
+        """Drop every cached answer whose context included one of `paper_ids`."""
+        with self._lock:
+            keys = set()
+            for paper_id in paper_ids:
+                keys |= self._by_paper.get(paper_id, set())
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "answer_cache_hits": self.hits,
+            "answer_cache_misses": self.misses,
+            "answer_cache_hit_rate": self.hits / lookups if lookups else 0.0,
+            "answer_cache_size": len(self._entries),
+            "answer_cache_invalidations": self.invalidations,
+        }
+
+    def _remove(self, key: int):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for paper_id in entry.paper_ids:
+            keys = self._by_paper.get(paper_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_paper[paper_id]
+
+    def _expire(self):
+        if self.ttl is None:
+            return
+        deadline = time.monotonic() - self.ttl
+        expired = [key for key, entry in self._entries.items() if entry.created_at < deadline]
+        for key in expired:
+            self._remove(key)
+
+    def _fetch_versions(self, paper_ids: List[str]) -> Dict[str, Optional[int]]:
+        """Return the current `ingested_at` per paper id; papers no longer in the graph map to None."""
+        query = """
+        UNWIND $ids AS paper_id
+        OPTIONAL MATCH (p:Paper {id: paper_id})
+        RETURN paper_id AS id, p.ingested_at AS ingested_at
+        """
+        with self.db_client.session() as session:
+            return {record["id"]: record["ingested_at"] for record in session.run(query, ids=paper_ids)}
+
+    def _maybe_refresh(self):
+        if self.db_client is None or not self._by_paper:
+            return
+        if time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return
+        self._refreshed_at = time.monotonic()
+        with self._lock:
+            paper_ids = list(self._by_paper)
+        try:
+            current = self._fetch_versions(paper_ids)
+        except Exception as e:
+            # Serving a possibly stale answer beats failing the request
+            self.logger.warning(f"Answer cache invalidation check failed: {str(e)}")
+            return
+        with self._lock:
+            stale = {
+                key
+                for paper_id in paper_ids
+                for key in self._by_paper.get(paper_id, ())
+                if self._entries[key].versions.get(paper_id) != current.get(paper_id)
+            }
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+        if stale:
+            self.logger.info(f"Invalidated {len(stale)} cached answers whose papers were re-ingested")
@@ -0,0 +1,78 @@
+from typing import Any, Dict, List, Sequence, Set, Tuple
+
+
+class ContextPacker:
+    """
+    Fit retrieved chunks into a prompt token budget, tokenizing each chunk exactly once.
+
+    Chunks are taken in retrieval order. A chunk whose token bigrams overlap
+    an already packed chunk by at least `duplicate_threshold` (Jaccard) is
+    dropped as a near-duplicate, and the first chunk that no longer fits is
+    truncated if at least `min_chunk_tokens` of budget remain. The token
+    counts computed here are returned so callers can report them without
+    encoding the context again.
+    """
+
+    def __init__(
+        self,
+        tokenizer,
+        token_budget: int = 2500,
+        duplicate_threshold: float = 0.8,
+        min_chunk_tokens: int = 64,
+        separator: str = "\n\n"
+    ):
+        self.tokenizer = tokenizer
+        self.token_budget = token_budget
+        self.duplicate_threshold = duplicate_threshold
+        self.min_chunk_tokens = min_chunk_tokens
+        self.separator = separator
+        self.separator_tokens = len(tokenizer.encode(separator))
+
+    @staticmethod
+    def _shingles(tokens: Sequence[int]) -> Set[Tuple[int, int]]:
+        return set(zip(tokens, tokens[1:])) if len(tokens) > 1 else {(token, -1) for token in tokens}
+
+    def _is_duplicate(self, shingles: Set[Tuple[int, int]], packed: List[Set[Tuple[int, int]]]) -> bool:
+        for other in packed:
+            union = len(shingles | other)
+            if union and len(shingles & other) / union >= self.duplicate_threshold:
+                return True
+        return False
+
+    def pack(self, chunks: Sequence[str]) -> Dict[str, Any]:
+        packed_text = []
+        packed_shingles = []
+        used = 0
+        duplicates = 0
+        truncated = 0
+        over_budget = 0
+
+        for chunk in chunks:
+            tokens = self.tokenizer.encode(chunk)
+            shingles = self._shingles(tokens)
+            if self._is_duplicate(shingles, packed_shingles):
+                duplicates += 1
+                continue
+            cost = len(tokens) + (self.separator_tokens if packed_text else 0)
+            remaining = self.token_budget - used
+            if cost > remaining:
+                room = remaining - (self.separator_tokens if packed_text else 0)
+                if room < self.min_chunk_tokens:
+                    over_budget += 1
+                    continue
+                tokens = tokens[:room]
+                chunk = self.tokenizer.decode(tokens)
+                cost = room + (self.separator_tokens if packed_text else 0)
+                truncated += 1
+            packed_text.append(chunk)
+            packed_shingles.append(shingles)
+            used += cost
+
+        return {
+            "context": self.separator.join(packed_text),
+            "context_tokens": used,
+            "chunks_packed": len(packed_text),
+            "chunks_duplicate": duplicates,
+            "chunks_truncated": truncated,
+            "chunks_over_budget": over_budget,
+        }
@@ -0,0 +1,207 @@
+import fcntl
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+DIGEST_SIZE = 32
+
+
+class EmbeddingCache:
+    """
+    Content-addressed, append-only embedding store on local disk.
+
+    Each entry is keyed by `sha256(model + NUL + text)`. Vectors live in
+    `vectors.f32` as a row-major float32 matrix and digests in `keys.bin`
+    (32 bytes per row, same order). The key index held in memory is a sorted
+    array of 64-bit digest prefixes plus row numbers (16 bytes per entry);
+    full digests are checked against the mapped key file on lookup.
+    `get_many` returns hits as read-only views into the memory map; the
+    LangChain `CachedEmbeddings` interface still converts them to lists.
+
+    Rows appended by this process are also held in memory until
+    `remap_threshold` of them have accumulated and the maps are rebuilt
+    (10000 rows is about 60 MB at 1536 dimensions).
+
+    Several processes may share the directory (e.g. the indexing backfill and
+    the app). Appends and the repair of a torn append run under an exclusive
+    `flock` on `lock`, and every append first re-checks that the two files
+    are row-aligned, so rows from concurrent writers never interleave. Each
+    process sees rows appended by others once it remaps.
+    """
+
+    def __init__(self, directory: str, remap_threshold: int = 10000):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.keys_path = os.path.join(directory, "keys.bin")
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.lock_path = os.path.join(directory, "lock")
+        self.remap_threshold = remap_threshold
+        self._lock = threading.Lock()
+
+        self.dim: Optional[int] = None
+        self._count = 0
+        self._keys = np.empty((0, DIGEST_SIZE), dtype=np.uint8)
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._sorted_prefixes = np.empty(0, dtype="<u8")
+        self._sorted_rows = np.empty(0, dtype=np.int64)
+        # Entries appended since the maps were built, served from memory until the next remap
+        self._pending: Dict[bytes, np.ndarray] = {}
+        with self._file_lock():
+            self._read_meta()
+            self._repair()
+            self._load()
+
+    @staticmethod
+    def digest(model: str, text: str) -> bytes:
+        return hashlib.sha256(model.encode("utf-8") + b"\0" + text.encode("utf-8")).digest()
+
+    def __len__(self) -> int:
+        return self._count + len(self._pending)
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Hold the directory's exclusive inter-process lock."""
+        with open(self.lock_path, "a+b") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_meta(self):
+        if self.dim is None and os.path.exists(self.meta_path):
+            with open(self.meta_path, "r") as f:
+                self.dim = json.load(f)["dim"]
+
+    def _repair(self):
+        """Drop a torn trailing append so the key and vector files stay row-aligned; needs the file lock."""
+        if self.dim is None or not os.path.exists(self.keys_path) or not os.path.exists(self.vectors_path):
+            return
+        rows = min(os.path.getsize(self.keys_path) // DIGEST_SIZE,
+                   os.path.getsize(self.vectors_path) // (self.dim * 4))
+        for path, row_size in ((self.keys_path, DIGEST_SIZE), (self.vectors_path, self.dim * 4)):
+            if os.path.getsize(path) != rows * row_size:
+                with open(path, "r+b") as f:
+                    f.truncate(rows * row_size)
+
+    def _load(self):
+        if self.dim is None or not os.path.exists(self.keys_path) or not os.path.exists(self.vectors_path):
+            return
+        key_rows = os.path.getsize(self.keys_path) // DIGEST_SIZE
+        vector_rows = os.path.getsize(self.vectors_path) // (self.dim * 4)
+        self._count = min(key_rows, vector_rows)
+        if self._count == 0:
+            return
+        self._keys = np.memmap(self.keys_path, dtype=np.uint8, mode="r", shape=(self._count, DIGEST_SIZE))
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self._count, self.dim))
+        prefixes = np.ascontiguousarray(self._keys[:, :8]).view("<u8").ravel()
+        order = np.argsort(prefixes, kind="stable")
+        self._sorted_prefixes = prefixes[order]
+        self._sorted_rows = order.astype(np.int64)
+
+    def _find(self, digest: bytes) -> Optional[int]:
+        prefix = np.frombuffer(digest[:8], dtype="<u8")[0]
+        i = int(np.searchsorted(self._sorted_prefixes, prefix))
+        while i < len(self._sorted_prefixes) and self._sorted_prefixes[i] == prefix:
+            row = int(self._sorted_rows[i])
+            if self._keys[row].tobytes() == digest:
+                return row
+            i += 1
+        return None
+
+    def get_many(self, digests: Sequence[bytes]) -> List[Optional[np.ndarray]]:
+        """Return a read-only float32 view per digest, or None for misses."""
+        with self._lock:
+            results = []
+            for digest in digests:
+                vector = self._pending.get(digest)
+                if vector is None:
+                    row = self._find(digest)
+                    vector = None if row is None else self._vectors[row]
+                results.append(vector)
+            return results
+
+    def put_many(self, digests: Sequence[bytes], vectors: Sequence[Sequence[float]]):
+        if not digests:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        with self._lock, self._file_lock():
+            # Another process may have created the cache since this one opened it
+            self._read_meta()
+            if self.dim is None:
+                self.dim = int(matrix.shape[1])
+                with open(self.meta_path, "w") as f:
+                    json.dump({"dim": self.dim}, f)
+            if matrix.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match cache dimension {self.dim}")
+
+            # Skip digests that are already stored, including duplicates within this call
+            fresh = {}
+            for digest, vector in zip(digests, matrix):
+                if digest not in fresh and digest not in self._pending and self._find(digest) is None:
+                    fresh[digest] = vector
+            if not fresh:
+                return
+
+            # Writers append under the lock, so any misalignment is a torn append from a crashed writer
+            self._repair()
+            with open(self.vectors_path, "ab") as f:
+                f.write(np.stack(list(fresh.values())).tobytes())
+            with open(self.keys_path, "ab") as f:
+                f.write(b"".join(fresh.keys()))
+            self._pending.update(fresh)
+            if len(self._pending) >= self.remap_threshold:
+                self._remap()
+
+    def _remap(self):
+        """Rebuild the maps and sorted index to cover rows appended by this process."""
+        self._load()
+        self._pending.clear()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    LangChain `Embeddings` wrapper that consults an `EmbeddingCache` before the wrapped model.
+
+    Only misses are sent to the model, in one `embed_documents` call, so
+    re-indexing an unchanged corpus makes no API calls at all. `embed_documents`
+    and `embed_query` return lists as LangChain expects, which copies every
+    vector; callers that can use arrays should call `embed_vectors`.
+    """
+
+    def __init__(self, model: Embeddings, cache: EmbeddingCache, model_name: Optional[str] = None):
+        self.model = model
+        self.cache = cache
+        self.model_name = model_name or getattr(model, "model", type(model).__name__)
+        self.hits = 0
+        self.misses = 0
+
+    def embed_vectors(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed texts and return float32 arrays; cache hits are memory-mapped views."""
+        digests = [EmbeddingCache.digest(self.model_name, text) for text in texts]
+        vectors = self.cache.get_many(digests)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            # Repeated texts within one call are embedded once
+            unique = list({digests[i]: i for i in missing}.values())
+            computed = self.model.embed_documents([texts[i] for i in unique])
+            self.cache.put_many([digests[i] for i in unique], computed)
+            by_digest = {digests[i]: np.asarray(vector, dtype=np.float32) for i, vector in zip(unique, computed)}
+            for i in missing:
+                vectors[i] = by_digest[digests[i]]
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [vector.tolist() for vector in self.embed_vectors(texts)]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_vectors([text])[0].tolist()
@@ -1,15 +1,19 @@
 from langchain_openai import OpenAIEmbeddings
+from src.components.rag.embedding_cache import CachedEmbeddings, EmbeddingCache
 from typing import List, Optional
 import os
 
 class Embedding:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, cache_dir: Optional[str] = None):
         if not api_key and not os.getenv("OPENAI_API_KEY"):
             raise ValueError("OpenAI API key must be provided either directly or through environment variable")
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key.startswith("sk-"):
             raise ValueError("Invalid OpenAI API key format")
         self.model = OpenAIEmbeddings(openai_api_key=self.api_key)
+        if cache_dir:
+            # Everything that embeds through `self.model`, including VectorStore queries, hits the cache first
+            self.model = CachedEmbeddings(self.model, EmbeddingCache(cache_dir))
 
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
@@ -1,6 +1,42 @@
-from src.services.database.neo4j_client import Neo4jClient
-from src.services.rag.embeddings import Embedding
+from src.components.database.neo4j_client import Neo4jClient
+from src.components.rag.embeddings import Embedding
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
 import logging
+import threading
+import time
+import tiktoken
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket; `acquire` blocks until enough budget has refilled.
+
+    A request larger than the whole bucket waits for a full bucket and then
+    drives it into debt, so later requests wait for the excess too and the
+    long-run rate never exceeds `rate_per_second`.
+    """
+
+    def __init__(self, rate_per_second: float, capacity: Optional[float] = None):
+        self.rate = rate_per_second
+        self.capacity = capacity or rate_per_second
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount: float):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                needed = min(amount, self.capacity)
+                if self.tokens >= needed:
+                    self.tokens -= amount
+                    return
+                wait = (needed - self.tokens) / self.rate
+            time.sleep(wait)
+
 
 class IndexingService:
     def __init__(
@@ -19,6 +55,12 @@ class IndexingService:
             if not self._vector_index_exists(session, index_name):
                 self._create_vector_index(session, index_name)
 
+    def ensure_fulltext_index(self, index_name: str):
+        with self.db_client.session() as session:
+            session.run(
+                f"CREATE FULLTEXT INDEX {index_name} IF NOT EXISTS FOR (p:Paper) ON EACH [p.title, p.abstract]"
+            )
+
     def _vector_index_exists(self, session, index_name: str) -> bool:
         query = """
         SHOW INDEXES
@@ -40,3 +82,118 @@ class IndexingService:
         )
         """, index_name=index_name)
         self.logger.info(f"Vector index '{index_name}' created.")
+
+    def backfill_embeddings(
+        self,
+        page_size: int = 5000,
+        max_concurrency: int = 4,
+        tokens_per_minute: int = 1_000_000,
+        requests_per_minute: int = 3000,
+        after_id: str = ""
+    ) -> Dict[str, Any]:
+        """
+        Compute and store `Paper.embedding` for every paper that does not have one yet.
+
+        Papers are streamed out of Neo4j in id-ordered pages, embedded in
+        batches of `self.batch_size` abstracts with up to `max_concurrency`
+        requests in flight under a token-bucket rate limit, and written back
+        with one UNWIND per batch. Only papers without an embedding are read,
+        so an interrupted run resumes where it stopped; `after_id` skips ahead.
+
+        Returns:
+            Totals and throughput for the run
+        """
+        encoding = tiktoken.get_encoding("cl100k_base")
+        # The API enforces per-minute limits, so a minute of budget may be spent in one burst
+        token_bucket = TokenBucket(tokens_per_minute / 60, capacity=tokens_per_minute)
+        request_bucket = TokenBucket(requests_per_minute / 60, capacity=requests_per_minute)
+        in_flight = threading.BoundedSemaphore(max_concurrency * 2)
+        lock = threading.Lock()
+        stats = {"embedded": 0, "tokens": 0, "failed_batches": 0}
+        start_time = time.time()
+
+        def embed_batch(rows: List[Dict[str, str]]):
+            try:
+                texts = [row["abstract"] or "" for row in rows]
+                tokens = sum(len(encoding.encode(text)) for text in texts)
+                request_bucket.acquire(1)
+                token_bucket.acquire(tokens)
+                vectors = self.embedding_service.embed_documents(texts)
+                self._write_embeddings(rows, vectors)
+                with lock:
+                    stats["embedded"] += len(rows)
+                    stats["tokens"] += tokens
+                    embedded, total_tokens = stats["embedded"], stats["tokens"]
+                elapsed = time.time() - start_time
+                self.logger.info(
+                    f"Embedded {embedded} papers up to {rows[-1]['id']} "
+                    f"({embedded / elapsed:.1f} embeddings/sec, {total_tokens / elapsed:.0f} tokens/sec)"
+                )
+            except Exception as e:
+                with lock:
+                    stats["failed_batches"] += 1
+                # The papers keep a null embedding and are picked up by the next run
+                self.logger.error(f"Embedding batch {rows[0]['id']}..{rows[-1]['id']} failed: {str(e)}")
+            finally:
+                in_flight.release()
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            for page in self._iter_unembedded_pages(page_size, after_id):
+                for i in range(0, len(page), self.batch_size):
+                    in_flight.acquire()
+                    executor.submit(embed_batch, page[i:i + self.batch_size])
+
+        elapsed = time.time() - start_time
+        summary = {
+            **stats,
+            "seconds": elapsed,
+            "embeddings_per_sec": stats["embedded"] / elapsed if elapsed > 0 else 0.0,
+            "tokens_per_sec": stats["tokens"] / elapsed if elapsed > 0 else 0.0,
+        }
+        self.logger.info(f"Embedding backfill finished: {summary}")
+        return summary
+
+    def _iter_unembedded_pages(self, page_size: int, after_id: str) -> Iterator[List[Dict[str, str]]]:
+        query = """
+        MATCH (p:Paper)
+        WHERE p.id > $after_id AND p.embedding IS NULL AND p.abstract IS NOT NULL
+          AND NOT coalesce(p.withdrawn, false)
+        RETURN p.id AS id, p.abstract AS abstract
+        ORDER BY p.id
+        LIMIT $limit
+        """
+        while True:
+            with self.db_client.session() as session:
+                page = [record.data() for record in session.run(query, after_id=after_id, limit=page_size)]
+            if not page:
+                return
+            yield page
+            after_id = page[-1]["id"]
+
+    def iter_embedded_papers(self, page_size: int = 5000) -> Iterator[Dict[str, Any]]:
+        """Stream `{"id", "abstract", "embedding"}` for every embedded, non-withdrawn paper, in id order."""
+        query = """
+        MATCH (p:Paper)
+        WHERE p.id > $after_id AND p.embedding IS NOT NULL AND NOT coalesce(p.withdrawn, false)
+        RETURN p.id AS id, p.abstract AS abstract, p.embedding AS embedding
+        ORDER BY p.id
+        LIMIT $limit
+        """
+        after_id = ""
+        while True:
+            with self.db_client.session() as session:
+                page = [record.data() for record in session.run(query, after_id=after_id, limit=page_size)]
+            if not page:
+                return
+            yield from page
+            after_id = page[-1]["id"]
+
+    def _write_embeddings(self, rows: List[Dict[str, str]], vectors: List[List[float]]):
+        query = """
+        UNWIND $rows AS row
+        MATCH (p:Paper {id: row.id})
+        SET p.embedding = row.embedding
+        """
+        payload = [{"id": row["id"], "embedding": vector} for row, vector in zip(rows, vectors)]
+        with self.db_client.session() as session:
+            session.execute_write(lambda tx: tx.run(query, rows=payload).consume())
@@ -0,0 +1,100 @@
+import asyncio
+import re
+import time
+from concurrent.futures import Executor, Future
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Union
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.components.rag.tool import RAG
+
+# The prefetch of the request being handled, so the shared RAG tool picks up only its own
+current_prefetch: ContextVar[Optional["RetrievalPrefetch"]] = ContextVar("current_prefetch", default=None)
+
+
+def _words(text: str) -> set:
+    return set(re.findall(r"\w+", text.lower()))
+
+
+class RetrievalPrefetch(BaseCallbackHandler):
+    """
+    Speculative `RAG.get_context` for a user message, started before the agent has planned.
+
+    Retrieval then overlaps the agent's first completion. When the RAG tool
+    is invoked with a query whose word overlap (Jaccard) with the message
+    reaches `match_threshold`, `take`/`atake` hand it the prefetched context;
+    otherwise the tool retrieves for its own query. As a callback handler it
+    cancels the prefetch as soon as the agent picks a different tool. A
+    retrieval already running on a thread cannot be interrupted, so its
+    result is simply discarded.
+    """
+
+    # Cancel from the agent's own thread or loop, before the next tool starts
+    run_inline = True
+
+    def __init__(self, question: str, rag_tool_name: str = "RAG", match_threshold: float = 0.6):
+        self.question = question
+        self.rag_tool_name = rag_tool_name
+        self.match_threshold = match_threshold
+        self._words = _words(question)
+        self._pending: Optional[Union[Future, asyncio.Task]] = None
+        self.used = False
+        self.cancelled = False
+
+    def start(self, rag_service: RAG, executor: Executor) -> "RetrievalPrefetch":
+        self._pending = executor.submit(rag_service.get_context, self.question)
+        return self
+
+    def astart(self, rag_service: RAG) -> "RetrievalPrefetch":
+        """Start the prefetch as a task on the running event loop."""
+        self._pending = asyncio.ensure_future(rag_service.aget_context(self.question))
+        return self
+
+    def matches(self, query: str) -> bool:
+        words = _words(query)
+        union = len(words | self._words)
+        return bool(union) and len(words & self._words) / union >= self.match_threshold
+
+    def take(self, query: str) -> Optional[Dict[str, Any]]:
+        """Return the prefetched context for a matching query, waiting for it if needed."""
+        if not self._claim(query):
+            return None
+        start_time = time.time()
+        return self._mark_prefetched(self._pending.result(), start_time)
+
+    async def atake(self, query: str) -> Optional[Dict[str, Any]]:
+        if not self._claim(query):
+            return None
+        start_time = time.time()
+        if isinstance(self._pending, Future):
+            return self._mark_prefetched(await asyncio.wrap_future(self._pending), start_time)
+        return self._mark_prefetched(await self._pending, start_time)
+
+    def cancel(self):
+        if self._pending is not None and not self.used and not self.cancelled:
+            self.cancelled = True
+            self._pending.cancel()
+
+    def on_agent_action(self, action: Any, **kwargs: Any):
+        if action.tool != self.rag_tool_name:
+            self.cancel()
+
+    def _claim(self, query: str) -> bool:
+        # A context is reused at most once; a second RAG call in the same turn retrieves afresh
+        if self._pending is None or self.used or self.cancelled:
+            return False
+        if not self.matches(query):
+            self.cancel()
+            return False
+        self.used = True
+        return True
+
+    @staticmethod
+    def _mark_prefetched(context: Dict[str, Any], start_time: float) -> Optional[Dict[str, Any]]:
+        if not context["metrics"]["success"]:
+            return None
+        context["metrics"]["prefetched"] = True
+        # Time the tool still spent waiting, i.e. the part of retrieval that did not overlap planning
+        context["metrics"]["prefetch_wait_time"] = time.time() - start_time
+        return context
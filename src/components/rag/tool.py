@@ -1,9 +1,11 @@
-from src.components.database.vector_store import VectorStore
+from src.components.database.vector_store import SearchFilter, VectorStore
 from langchain_core.prompts import PromptTemplate
 from langchain_openai import OpenAI
-from langchain.chains.llm import LLMChain
-from typing import Optional, Dict
+from typing import AsyncIterator, Optional, Dict, Iterator, List
 from src.components.evaluation.experiment_tracker import MetricsCollector
+from src.components.rag.context_packer import ContextPacker
+from src.components.rag.answer_cache import SemanticAnswerCache
+import asyncio
 import time
 
 class RAG:
@@ -11,19 +13,26 @@ class RAG:
         self,
         vector_store: VectorStore,
         openai_api_key: str,
-        prompt_template: Optional[str] = None
+        prompt_template: Optional[str] = None,
+        retrieval_mode: str = "vector",
+        context_token_budget: int = 2500,
+        answer_cache: Optional[SemanticAnswerCache] = None
     ):
         if not openai_api_key:
             raise ValueError("OpenAI API key must be provided")
+        if retrieval_mode not in ("vector", "hybrid", "graph"):
+            raise ValueError(f"Unknown retrieval mode: {retrieval_mode}")
         self.vector_store = vector_store
+        self.retrieval_mode = retrieval_mode
+        self.answer_cache = answer_cache
         self.llm = OpenAI(openai_api_key=openai_api_key)
         self.metrics_collector = MetricsCollector()
+        self.context_packer = ContextPacker(self.metrics_collector.tokenizer, token_budget=context_token_budget)
 
         self.prompt_template = PromptTemplate(
             input_variables=['context', 'question'],
             template=prompt_template or self._default_prompt_template()
         )
-        self.llm_chain = LLMChain(llm=self.llm, prompt=self.prompt_template)
 
     def _default_prompt_template(self) -> str:
         return """
@@ -38,71 +47,269 @@ class RAG:
         Provide a detailed and accurate answer based on the context provided.
         """
 
-    def answer_question(self, question: str, k: int = 3) -> Dict[str, any]:
+    def answer_question(
+        self,
+        question: str,
+        k: int = 3,
+        search_filter: Optional[SearchFilter] = None,
+        context: Optional[Dict[str, any]] = None
+    ) -> Dict[str, any]:
+        result = {}
+        for _ in self.stream_answer(question, k, search_filter, result, context):
+            pass
+        return result
+
+    def stream_answer(
+        self,
+        question: str,
+        k: int = 3,
+        search_filter: Optional[SearchFilter] = None,
+        result: Optional[Dict[str, any]] = None,
+        context: Optional[Dict[str, any]] = None
+    ) -> Iterator[str]:
+        """
+        Yield the answer as the LLM generates it.
+
+        When the generator is exhausted, `result` (if given) holds the same
+        `{"response", "metrics"}` dict that `answer_question` returns, with
+        `time_to_first_token` added to the metrics. A `context` already
+        returned by `get_context` (e.g. prefetched) is used instead of
+        retrieving again.
+        """
+        result = result if result is not None else {}
         start_time = time.time()
+        response = ""
         try:
+            # Filtered answers depend on more than the question, so they bypass the cache
+            question_embedding = None
+            if self.answer_cache is not None and (search_filter is None or search_filter.is_empty()):
+                question_embedding = self.vector_store.embed_queries([question])[0]
+                cached = self.answer_cache.lookup(question_embedding)
+                if cached is not None:
+                    yield cached.answer
+                    result.update(self._cached_result(cached, start_time))
+                    return
+
             # Get context with metrics
-            context_result = self.get_context(question, k)
-            context = context_result["context"]
+            context_result = context if context is not None else self.get_context(question, k, search_filter)
             metrics = context_result["metrics"]
 
             # Generate response
-            response = self.llm_chain.run(context=context, question=question)
+            prompt = self.prompt_template.format(context=context_result["context"], question=question)
+            first_token_at = None
+            for chunk in self.llm.stream(prompt):
+                if first_token_at is None:
+                    first_token_at = time.time()
+                response += chunk
+                yield chunk
+            if question_embedding is not None:
+                metrics["answer_cache_hit"] = False
+                # An answer without source papers could never be invalidated on re-ingestion, so it is not cached
+                if metrics["success"] and context_result["paper_ids"]:
+                    self.answer_cache.put(question, question_embedding, response, context_result["paper_ids"])
+            result.update(self._answer_result(response, metrics, start_time, first_token_at))
+        except Exception as e:
+            message = f"Error generating answer: {str(e)}"
+            yield message if not response else f"\n\n{message}"
+            result.update(self._error_result(e, start_time))
+
+    async def aanswer_question(
+        self,
+        question: str,
+        k: int = 3,
+        search_filter: Optional[SearchFilter] = None,
+        context: Optional[Dict[str, any]] = None
+    ) -> Dict[str, any]:
+        result = {}
+        async for _ in self.astream_answer(question, k, search_filter, result, context):
+            pass
+        return result
 
-            # Add response metrics
-            response_stats = self.metrics_collector.get_text_stats(response)
-            metrics.update({
-                "response_length": len(response),
-                "response_tokens": response_stats["token_count"],
+    async def astream_answer(
+        self,
+        question: str,
+        k: int = 3,
+        search_filter: Optional[SearchFilter] = None,
+        result: Optional[Dict[str, any]] = None,
+        context: Optional[Dict[str, any]] = None
+    ) -> AsyncIterator[str]:
+        """Async variant of `stream_answer`; retrieval and generation never block the event loop."""
+        result = result if result is not None else {}
+        start_time = time.time()
+        response = ""
+        try:
+            question_embedding = None
+            if self.answer_cache is not None and (search_filter is None or search_filter.is_empty()):
+                question_embedding = (await self.vector_store.aembed_queries([question]))[0]
+                # The lookup may poll Neo4j for re-ingested papers over the sync driver
+                cached = await asyncio.to_thread(self.answer_cache.lookup, question_embedding)
+                if cached is not None:
+                    yield cached.answer
+                    result.update(self._cached_result(cached, start_time))
+                    return
+
+            context_result = context if context is not None else await self.aget_context(question, k, search_filter)
+            metrics = context_result["metrics"]
+
+            prompt = self.prompt_template.format(context=context_result["context"], question=question)
+            first_token_at = None
+            async for chunk in self.llm.astream(prompt):
+                if first_token_at is None:
+                    first_token_at = time.time()
+                response += chunk
+                yield chunk
+            if question_embedding is not None:
+                metrics["answer_cache_hit"] = False
+                # An answer without source papers could never be invalidated on re-ingestion, so it is not cached
+                if metrics["success"] and context_result["paper_ids"]:
+                    self.answer_cache.put(question, question_embedding, response, context_result["paper_ids"])
+            result.update(self._answer_result(response, metrics, start_time, first_token_at))
+        except Exception as e:
+            message = f"Error generating answer: {str(e)}"
+            yield message if not response else f"\n\n{message}"
+            result.update(self._error_result(e, start_time))
+
+    @staticmethod
+    def _cached_result(cached, start_time: float) -> Dict[str, any]:
+        return {
+            "response": cached.answer,
+            "metrics": {
+                "answer_cache_hit": True,
+                "answer_cache_similarity": cached.similarity,
+                "response_length": len(cached.answer),
+                "time_to_first_token": time.time() - start_time,
                 "total_processing_time": time.time() - start_time,
                 "success": True
-            })
-
-            return {
-                "response": response,
-                "metrics": metrics
             }
-        except Exception as e:
-            return {
-                "response": f"Error generating answer: {str(e)}",
-                "metrics": {
-                    "error": str(e),
-                    "success": False,
-                    "total_processing_time": time.time() - start_time
-                }
+        }
+
+    def _answer_result(
+        self,
+        response: str,
+        metrics: Dict[str, any],
+        start_time: float,
+        first_token_at: Optional[float]
+    ) -> Dict[str, any]:
+        # Add response metrics
+        metrics.update({
+            "response_length": len(response),
+            "response_tokens": self.metrics_collector.count_tokens(response),
+            "time_to_first_token": (first_token_at or time.time()) - start_time,
+            "total_processing_time": time.time() - start_time,
+            "success": True
+        })
+        return {
+            "response": response,
+            "metrics": metrics
+        }
+
+    @staticmethod
+    def _error_result(error: Exception, start_time: float) -> Dict[str, any]:
+        return {
+            "response": f"Error generating answer: {str(error)}",
+            "metrics": {
+                "error": str(error),
+                "success": False,
+                "total_processing_time": time.time() - start_time
             }
+        }
+
+    @staticmethod
+    def _format_graph_hit(hit: Dict[str, any]) -> str:
+        return (
+            f"Paper {hit['id']}: {hit['title']}\n"
+            f"Authors: {', '.join(hit['authors'])}\n"
+            f"Categories: {', '.join(hit['categories'])}\n"
+            f"{hit['abstract']}"
+        )
 
-    def get_context(self, question: str, k: int = 3) -> Dict[str, any]:
+    @staticmethod
+    def _format_related(related: List[Dict[str, any]]) -> str:
+        lines = [f"- {paper['id']}: {paper['title']}" for paper in related]
+        return "Related papers (sharing authors or categories):\n" + "\n".join(lines)
+
+    def get_context(
+        self,
+        question: str,
+        k: int = 3,
+        search_filter: Optional[SearchFilter] = None
+    ) -> Dict[str, any]:
         start_time = time.time()
         try:
-            relevant_docs = self.vector_store.similarity_search(question, k=k)
-            context = "\n\n".join([doc for doc, _ in relevant_docs])
-
-            # Collect metrics
-            context_stats = self.metrics_collector.get_text_stats(context)
-            question_stats = self.metrics_collector.get_text_stats(question)
-
-            metrics = {
-                "context_length": len(context),
-                "context_tokens": context_stats["token_count"],
-                "context_chunks": len(relevant_docs),
-                "question_length": len(question),
-                "question_tokens": question_stats["token_count"],
-                "retrieval_time": time.time() - start_time,
-                "success": True
-            }
+            search_timings = {}
+            if self.retrieval_mode == "hybrid":
+                hits, search_timings = self.vector_store.hybrid_search(question, k=k, search_filter=search_filter)
+            elif self.retrieval_mode == "graph":
+                hits = self.vector_store.graph_search(question, k=k, search_filter=search_filter)
+            else:
+                hits = self.vector_store.similarity_search_with_ids(question, k=k, search_filter=search_filter)
+            return self._build_context(question, hits, search_timings, start_time)
+        except Exception as e:
+            return self._context_error(e, start_time)
 
-            return {
-                "context": context,
-                "metrics": metrics
-            }
+    async def aget_context(
+        self,
+        question: str,
+        k: int = 3,
+        search_filter: Optional[SearchFilter] = None
+    ) -> Dict[str, any]:
+        start_time = time.time()
+        try:
+            search_timings = {}
+            if self.retrieval_mode == "hybrid":
+                hits, search_timings = await self.vector_store.ahybrid_search(question, k=k, search_filter=search_filter)
+            elif self.retrieval_mode == "graph":
+                hits = await self.vector_store.agraph_search(question, k=k, search_filter=search_filter)
+            else:
+                hits = await self.vector_store.asimilarity_search_with_ids(question, k=k, search_filter=search_filter)
+            return self._build_context(question, hits, search_timings, start_time)
         except Exception as e:
-            return {
-                "context": "",
-                "metrics": {
-                    "error": str(e),
-                    "success": False,
-                    "retrieval_time": time.time() - start_time
-                }
-            }
+            return self._context_error(e, start_time)
 
+    def _build_context(self, question: str, hits, search_timings: Dict[str, float], start_time: float) -> Dict[str, any]:
+        if self.retrieval_mode == "graph":
+            hits, related = hits
+            relevant_docs = [(self._format_graph_hit(hit), hit["score"]) for hit in hits]
+            if related:
+                relevant_docs.append((self._format_related(related), 0.0))
+            search_timings = {"related_papers": len(related)}
+            paper_ids = [hit["id"] for hit in hits] + [paper["id"] for paper in related]
+        else:
+            relevant_docs = [(content, score) for _, content, score in hits]
+            paper_ids = [paper_id for paper_id, _, _ in hits]
+        packed = self.context_packer.pack([doc for doc, _ in relevant_docs])
+        context = packed["context"]
+
+        # Token counts come from packing, so the context is not encoded twice
+        metrics = {
+            "context_length": len(context),
+            "context_tokens": packed["context_tokens"],
+            "context_chunks": packed["chunks_packed"],
+            "retrieved_chunks": len(relevant_docs),
+            "duplicate_chunks": packed["chunks_duplicate"],
+            "truncated_chunks": packed["chunks_truncated"],
+            "dropped_chunks": packed["chunks_over_budget"],
+            "question_length": len(question),
+            "question_tokens": self.metrics_collector.count_tokens(question),
+            "retrieval_time": time.time() - start_time,
+            "success": True,
+            **search_timings
+        }
+
+        return {
+            "context": context,
+            "paper_ids": [paper_id for paper_id in paper_ids if paper_id],
+            "metrics": metrics
+        }
+
+    @staticmethod
+    def _context_error(error: Exception, start_time: float) -> Dict[str, any]:
+        return {
+            "context": "",
+            "paper_ids": [],
+            "metrics": {
+                "error": str(error),
+                "success": False,
+                "retrieval_time": time.time() - start_time
+            }
+        }
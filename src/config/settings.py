@@ -12,3 +12,22 @@ class Settings:
         self.neo4j_uri = os.getenv("NEO4J_URI")
         self.neo4j_user = os.getenv("NEO4J_USERNAME")
         self.neo4j_password = os.getenv("NEO4J_PASSWORD")
+        self.embedding_cache_dir = os.getenv("EMBEDDING_CACHE_DIR")
+        self.vector_backend = os.getenv("VECTOR_BACKEND", "neo4j")
+        self.local_vector_index_dir = os.getenv("LOCAL_VECTOR_INDEX_DIR")
+        self.vector_nprobe = int(os.getenv("VECTOR_NPROBE", "16"))
+        self.vector_rerank = int(os.getenv("VECTOR_RERANK", "4"))
+        self.query_cache_size = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+        self.query_cache_ttl = float(os.getenv("QUERY_CACHE_TTL", "3600"))
+        self.retrieval_mode = os.getenv("RETRIEVAL_MODE", "vector")
+        self.context_token_budget = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2500"))
+        self.answer_cache_size = int(os.getenv("ANSWER_CACHE_SIZE", "0"))
+        self.answer_cache_ttl = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+        self.answer_cache_threshold = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+        self.fast_path_routing = os.getenv("FAST_PATH_ROUTING", "true").lower() == "true"
+        self.speculative_retrieval = os.getenv("SPECULATIVE_RETRIEVAL", "true").lower() == "true"
+        self.evaluation_workers = int(os.getenv("EVALUATION_WORKERS", "2"))
+        self.evaluation_queue_size = int(os.getenv("EVALUATION_QUEUE_SIZE", "100"))
+        self.evaluation_overflow = os.getenv("EVALUATION_OVERFLOW", "drop")
+        self.evaluation_spill_path = os.getenv("EVALUATION_SPILL_PATH", "evaluation_spill.jsonl")
+        self.evaluation_shutdown_timeout = float(os.getenv("EVALUATION_SHUTDOWN_TIMEOUT", "30"))
@@ -1,7 +1,11 @@
+import asyncio
 import uuid
 import time
 import logging
-from typing import Dict, Any
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional
 
 from langchain_community.chat_models import ChatOpenAI
 from langchain.schema import HumanMessage, AIMessage
@@ -12,12 +16,18 @@ from src.components.database.neo4j_client import Neo4jClient
 from src.components.paper.tool import PaperTool
 from src.components.rag.tool import RAG
 from src.components.rag.embeddings import Embedding
+from src.components.rag.indexing import IndexingService
+from src.components.rag.answer_cache import SemanticAnswerCache
+from src.components.rag.prefetch import RetrievalPrefetch, current_prefetch
 from src.components.database.vector_store import VectorStore
 from src.components.evaluation.experiment_tracker import ExperimentTracker, MetricsCollector
 from src.components.evaluation.opik_evaluator import LlmEvaluator
+from src.components.evaluation.background_evaluator import BackgroundEvaluator
 from src.tools.paper_lookup import PaperLookupTool
 from src.tools.rag import RAGTool
 from src.agents.research_assistant import ResearchAssistant
+from src.agents.streaming import ANSWER_RESTART, FinalAnswerStreamHandler
+from src.orchestrator.fast_path import FastPathRouter
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -41,10 +51,23 @@ class Coordinator:
         self.services = self.initialize_services()
         self.tools = self.initialize_tools()
         self.assistant = self.initialize_assistant()
+        self.fast_path_router = FastPathRouter(self.tools["paper_lookup"]) if self.settings.fast_path_routing else None
+        self.prefetch_executor = ThreadPoolExecutor(max_workers=4) if self.settings.speculative_retrieval else None
         self.graph = self.setup_graph()
+        # Totals across every session this coordinator served; the history itself lives in each state
+        self.user_message_count = 0
+        self.ai_message_count = 0
 
         # Instantiate our new evaluator
         self.llm_evaluator = LlmEvaluator()
+        self.evaluator = BackgroundEvaluator(
+            llm_evaluator=self.llm_evaluator,
+            experiment_tracker=self.experiment_tracker,
+            workers=self.settings.evaluation_workers,
+            queue_size=self.settings.evaluation_queue_size,
+            overflow=self.settings.evaluation_overflow,
+            spill_path=self.settings.evaluation_spill_path
+        )
 
     def setup_experiment_tracker(self) -> ExperimentTracker:
         tracker = ExperimentTracker(
@@ -65,16 +88,39 @@ class Coordinator:
         with db_client.session() as session:
             result = session.run("RETURN 1 as num").single()
             print(f"Initial connection test result: {result['num']}")
-        embedding_service = Embedding(api_key=self.settings.openai_api_key)
+        embedding_service = Embedding(
+            api_key=self.settings.openai_api_key,
+            cache_dir=self.settings.embedding_cache_dir
+        )
         vector_store = VectorStore(
             neo4j_client=db_client,
             embedding_model=embedding_service.model,
-            index_name="paper_vector_index"
+            index_name="paper_vector_index",
+            backend=self.settings.vector_backend,
+            local_index_dir=self.settings.local_vector_index_dir,
+            nprobe=self.settings.vector_nprobe,
+            rerank=self.settings.vector_rerank,
+            query_cache_size=self.settings.query_cache_size,
+            query_cache_ttl=self.settings.query_cache_ttl,
+            fulltext_index_name="paper_fulltext_index"
         )
+        if self.settings.retrieval_mode == "hybrid":
+            IndexingService(db_client, embedding_service).ensure_fulltext_index("paper_fulltext_index")
+        answer_cache = None
+        if self.settings.answer_cache_size > 0:
+            answer_cache = SemanticAnswerCache(
+                db_client=db_client,
+                max_size=self.settings.answer_cache_size,
+                ttl=self.settings.answer_cache_ttl,
+                threshold=self.settings.answer_cache_threshold
+            )
         paper_service = PaperTool(db_client=db_client)
         rag_service = RAG(
             vector_store=vector_store,
-            openai_api_key=self.settings.openai_api_key
+            openai_api_key=self.settings.openai_api_key,
+            retrieval_mode=self.settings.retrieval_mode,
+            context_token_budget=self.settings.context_token_budget,
+            answer_cache=answer_cache
         )
 
         return {
@@ -104,7 +150,8 @@ class Coordinator:
     def initialize_assistant(self) -> ResearchAssistant:
         llm = ChatOpenAI(
             temperature=0,
-            openai_api_key=self.settings.openai_api_key
+            openai_api_key=self.settings.openai_api_key,
+            streaming=True
         )
         tools = [self.tools["paper_lookup"], self.tools["rag"]]
         return ResearchAssistant(
@@ -121,9 +168,24 @@ class Coordinator:
         )
 
     def process_message(self, message: str, state: Dict[str, Any]) -> None:
+        for _ in self.stream_message(message, state):
+            pass
+
+    def stream_message(self, message: str, state: Dict[str, Any]) -> Iterator[Any]:
+        """
+        Process a message like `process_message`, yielding the assistant's final
+        answer as the LLM generates it. `ANSWER_RESTART` is yielded when the
+        agent was re-prompted and the text yielded so far must be discarded.
+
+        The agent runs on a worker thread; `FinalAnswerStreamHandler` forwards
+        final-answer tokens through a queue to the caller's thread, which is
+        the only one that touches the UI. Once streaming ends the answer is
+        queued for evaluation on the background evaluator.
+        """
         try:
             # Store user message
             state["messages"].append(HumanMessage(content=message))
+            self.user_message_count += 1
 
             # Log conversation metrics
             self.experiment_tracker.experiment.log_metrics({
@@ -131,51 +193,175 @@ class Coordinator:
                 "message_length": len(message)
             })
 
+            if self.fast_path_router is not None:
+                ai_text = self.fast_path_router.route(message)
+                if ai_text is not None:
+                    ai_messages = self._record_fast_path(state, ai_text)
+                    yield ai_text
+                    self.evaluator.submit(message, ai_text)
+                    self._print_response(ai_messages)
+                    return
+
+            tokens = queue.Queue()
+            handler = FinalAnswerStreamHandler(tokens.put)
+            outcome = {}
+            # Plain dict over the same lists, so the worker never touches Streamlit's session state
+            assistant_state = {key: state[key] for key in ("messages", "metrics", "conversation_history") if key in state}
+            start_time = time.time()
+            prefetch = None
+            if self.prefetch_executor is not None:
+                prefetch = self._new_prefetch(message).start(self.services["rag_service"], self.prefetch_executor)
+
+            def run_assistant():
+                # The worker thread starts with an empty context, so the RAG tool sees only this prefetch
+                current_prefetch.set(prefetch)
+                try:
+                    outcome["response"] = self.assistant(assistant_state, callbacks=self._callbacks(handler, prefetch))
+                except Exception as e:
+                    outcome["error"] = e
+                finally:
+                    tokens.put(None)
+
+            worker = threading.Thread(target=run_assistant, daemon=True)
+            worker.start()
+            while True:
+                token = tokens.get()
+                if token is None:
+                    break
+                yield token
+            worker.join()
+            if prefetch is not None:
+                prefetch.cancel()
+            if "error" in outcome:
+                raise outcome["error"]
+
             # Assistant response (LangChain chain)
-            response = self.assistant(state)
-            ai_messages = response["messages"]
-            state["messages"].extend(ai_messages)
+            ai_messages = outcome["response"]["messages"]
+            ai_text = self._record_response(state, ai_messages, handler, start_time)
+            if handler.streamed != ai_text:
+                # The answer did not arrive in the expected JSON shape, so send it whole
+                if handler.displayed:
+                    yield ANSWER_RESTART
+                yield ai_text
 
-            # Grab the final user-facing output
-            ai_text = ai_messages[-1].content if ai_messages else ""
+            self.evaluator.submit(message, ai_text)
+            self._print_response(ai_messages)
 
-            # Hallucination score
-            hallucination_score = self.llm_evaluator.check_hallucination(message, ai_text)
-            self.experiment_tracker.experiment.log_metric("hallucination_score", hallucination_score)
+        except Exception as e:
+            self.experiment_tracker.experiment.log_metric("errors", 1)
+            print(f"Error in process_message: {str(e)}")
 
-            # Moderation score
-            moderation_score = self.llm_evaluator.check_moderation(ai_text)
-            self.experiment_tracker.experiment.log_metric("moderation_score", moderation_score)
+    async def aprocess_message(self, message: str, state: Dict[str, Any]) -> None:
+        async for _ in self.astream_message(message, state):
+            pass
 
-            # Evaluate references (Contains, Equals, LevenshteinRatio)
-            metric_scores = self.llm_evaluator.evaluate(ai_text)
-            for metric_name, score_result in metric_scores.items():
-                self.experiment_tracker.experiment.log_metric(metric_name, score_result.value)
+    async def astream_message(self, message: str, state: Dict[str, Any]) -> AsyncIterator[Any]:
+        """
+        Async variant of `stream_message`.
 
-            # Answer relevance
-            relevance_score = self.llm_evaluator.check_answer_relevance(
-                input_text=message,
-                output_text=ai_text,
-            )
+        The agent runs as a task on the caller's event loop with its tools
+        awaited through `_arun`, so one loop can serve many sessions at once
+        instead of parking a thread per request.
+        """
+        try:
+            state["messages"].append(HumanMessage(content=message))
+            self.user_message_count += 1
 
-            # GEval metric
-            g_eval_score = self.llm_evaluator.check_g_eval(
-                output_text=ai_text
-            )
-            self.experiment_tracker.experiment.log_metric("g_eval_score", g_eval_score)
+            self.experiment_tracker.experiment.log_metrics({
+                "conversation_turn": len(state["messages"]),
+                "message_length": len(message)
+            })
+
+            if self.fast_path_router is not None:
+                ai_text = await self.fast_path_router.aroute(message)
+                if ai_text is not None:
+                    ai_messages = self._record_fast_path(state, ai_text)
+                    yield ai_text
+                    self.evaluator.submit(message, ai_text)
+                    self._print_response(ai_messages)
+                    return
+
+            # The handler runs inline on this loop, so a plain asyncio queue suffices
+            tokens = asyncio.Queue()
+            handler = FinalAnswerStreamHandler(tokens.put_nowait)
+            assistant_state = {key: state[key] for key in ("messages", "metrics", "conversation_history") if key in state}
+            start_time = time.time()
+            prefetch = None
+            if self.prefetch_executor is not None:
+                prefetch = self._new_prefetch(message).astart(self.services["rag_service"])
+
+            async def run_assistant():
+                # Set inside the task, so concurrent sessions on this loop keep their own prefetch
+                current_prefetch.set(prefetch)
+                try:
+                    return await self.assistant.acall(assistant_state, callbacks=self._callbacks(handler, prefetch))
+                finally:
+                    tokens.put_nowait(None)
 
-            self.experiment_tracker.experiment.log_metric("answer_relevance_score", relevance_score)
-            logger.info(f"Answer Relevance score: {relevance_score}")
+            task = asyncio.create_task(run_assistant())
+            try:
+                while True:
+                    token = await tokens.get()
+                    if token is None:
+                        break
+                    yield token
+                response = await task
+            finally:
+                if prefetch is not None:
+                    prefetch.cancel()
 
-            # Print final answer
-            for msg in ai_messages:
-                if isinstance(msg, AIMessage):
-                    self.experiment_tracker.experiment.log_metrics({"response_length": len(msg.content)})
-                    print(f"Assistant: {msg.content}")
+            ai_messages = response["messages"]
+            ai_text = self._record_response(state, ai_messages, handler, start_time)
+            if handler.streamed != ai_text:
+                if handler.displayed:
+                    yield ANSWER_RESTART
+                yield ai_text
+
+            self.evaluator.submit(message, ai_text)
+            self._print_response(ai_messages)
 
         except Exception as e:
             self.experiment_tracker.experiment.log_metric("errors", 1)
-            print(f"Error in process_message: {str(e)}")
+            print(f"Error in aprocess_message: {str(e)}")
+
+    def _new_prefetch(self, message: str) -> RetrievalPrefetch:
+        return RetrievalPrefetch(message, rag_tool_name=self.tools["rag"].name)
+
+    @staticmethod
+    def _callbacks(handler: FinalAnswerStreamHandler, prefetch: Optional[RetrievalPrefetch]) -> List[Any]:
+        return [handler] if prefetch is None else [handler, prefetch]
+
+    def _record_response(
+            self,
+            state: Dict[str, Any],
+            ai_messages: List[AIMessage],
+            handler: FinalAnswerStreamHandler,
+            start_time: float
+    ) -> str:
+        state["messages"].extend(ai_messages)
+        self.ai_message_count += len(ai_messages)
+        time_to_first_token = (handler.first_token_at or time.time()) - start_time
+        self.experiment_tracker.experiment.log_metric("time_to_first_token", time_to_first_token)
+        if self.fast_path_router is not None:
+            self.fast_path_router.record_agent(time.time() - start_time)
+            self.experiment_tracker.log_fast_path(False, self.fast_path_router.stats())
+        # Grab the final user-facing output
+        return ai_messages[-1].content if ai_messages else ""
+
+    def _record_fast_path(self, state: Dict[str, Any], ai_text: str) -> List[AIMessage]:
+        ai_messages = [AIMessage(content=ai_text)]
+        # Stored in the session state like any other turn, so follow-up questions can refer to the paper
+        state["messages"].extend(ai_messages)
+        self.ai_message_count += len(ai_messages)
+        self.experiment_tracker.log_fast_path(True, self.fast_path_router.stats())
+        return ai_messages
+
+    def _print_response(self, ai_messages: List[AIMessage]):
+        # Print final answer
+        for msg in ai_messages:
+            if isinstance(msg, AIMessage):
+                self.experiment_tracker.experiment.log_metrics({"response_length": len(msg.content)})
+                print(f"Assistant: {msg.content}")
 
     def run(self):
         try:
@@ -199,22 +385,30 @@ class Coordinator:
             print(f"\n\nAn error occurred: {str(e)}")
             self.cleanup()
 
+    async def acleanup(self):
+        """`cleanup` for async callers, which also closes the async Neo4j driver on the running loop."""
+        await self.services["db_client"].aclose()
+        self.cleanup()
+
     def cleanup(self):
         try:
+            if hasattr(self, 'evaluator'):
+                # Pending judge scores are logged before the experiment ends, up to the shutdown timeout
+                self.evaluator.close(timeout=self.settings.evaluation_shutdown_timeout)
+                self.experiment_tracker.experiment.log_metrics(self.evaluator.stats())
             if hasattr(self, 'experiment_tracker'):
                 session_end_time = time.strftime("%Y-%m-%d %H:%M:%S")
                 self.experiment_tracker.experiment.log_parameter("session_end", session_end_time)
                 final_metrics = {
-                    "total_messages": len(self.assistant.memory.chat_memory.messages),
-                    "total_user_messages": len(
-                        [m for m in self.assistant.memory.chat_memory.messages if isinstance(m, HumanMessage)]
-                    ),
-                    "total_ai_messages": len(
-                        [m for m in self.assistant.memory.chat_memory.messages if isinstance(m, AIMessage)]
-                    )
+                    "total_messages": self.user_message_count + self.ai_message_count,
+                    "total_user_messages": self.user_message_count,
+                    "total_ai_messages": self.ai_message_count
                 }
                 self.experiment_tracker.experiment.log_metrics(final_metrics)
                 self.experiment_tracker.experiment.end()
+            if self.prefetch_executor is not None:
+                self.prefetch_executor.shutdown(wait=False, cancel_futures=True)
+            self.services["vector_store"].close()
             self.services["db_client"].close()
             print("\nSession ended. Thank you for using the Research Paper Assistant!")
         except Exception as e:
@@ -0,0 +1,92 @@
+import json
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+from src.tools.paper_lookup import PaperLookupTool
+
+# A message is routed only when, apart from the id, it is nothing but lookup phrasing.
+# Anything else ("compare 0704.2002 with ...") needs the agent, so it is left alone.
+LOOKUP_REQUEST = re.compile(r"""
+    ^\s*
+    (?:(?:please|can\s+you|could\s+you)\s+)?
+    (?:(?:show|get|find|fetch|retrieve|look\s*up|display|open|pull\s+up|give)(?:\s+me)?\s+)?
+    (?:what(?:'s|\s+is)\s+)?
+    (?:(?:the|details\s+(?:of|for|on)|info(?:rmation)?\s+(?:on|about|for))\s+)?
+    (?:(?:arxiv\s+)?(?:paper|article)\s*)?
+    (?:(?:id|number|no\.?)\s*)?
+    [:#]?\s*
+    (?P<id>\d{4}\.\d{4})(?!\d)(?:v\d+)?
+    \s*(?:please)?[\s?.!]*$
+""", re.IGNORECASE | re.VERBOSE)
+
+
+class FastPathRouter:
+    """
+    Answer bare paper-id lookups with the Paper Lookup tool directly, without the ReAct agent.
+
+    Such a message would otherwise cost at least two chat-completion round
+    trips only to end up calling the same tool. The router keeps running
+    counts of both paths so `stats()` can report the fraction of messages
+    that took the fast path and the latency saved, estimated as the average
+    agent turn minus the average fast-path turn for every routed message.
+    """
+
+    def __init__(self, paper_lookup_tool: PaperLookupTool):
+        self.paper_lookup_tool = paper_lookup_tool
+        self._lock = threading.Lock()
+        self.fast_path_count = 0
+        self.fast_path_time = 0.0
+        self.agent_count = 0
+        self.agent_time = 0.0
+
+    @staticmethod
+    def match(message: str) -> Optional[str]:
+        """Return the paper id if the message is a plain lookup request."""
+        match = LOOKUP_REQUEST.match(message)
+        return match.group("id") if match else None
+
+    def route(self, message: str) -> Optional[str]:
+        """Answer the message on the fast path, or return None to leave it to the agent."""
+        if self.match(message) is None:
+            return None
+        start_time = time.time()
+        output = self.paper_lookup_tool.run(message)
+        self._record(fast_path=True, elapsed=time.time() - start_time)
+        return json.loads(output)["tool_answer"]
+
+    async def aroute(self, message: str) -> Optional[str]:
+        if self.match(message) is None:
+            return None
+        start_time = time.time()
+        output = await self.paper_lookup_tool.arun(message)
+        self._record(fast_path=True, elapsed=time.time() - start_time)
+        return json.loads(output)["tool_answer"]
+
+    def record_agent(self, elapsed: float):
+        """Record the latency of a message that went through the agent."""
+        self._record(fast_path=False, elapsed=elapsed)
+
+    def _record(self, fast_path: bool, elapsed: float):
+        with self._lock:
+            if fast_path:
+                self.fast_path_count += 1
+                self.fast_path_time += elapsed
+            else:
+                self.agent_count += 1
+                self.agent_time += elapsed
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.fast_path_count + self.agent_count
+            fast_path_latency = self.fast_path_time / self.fast_path_count if self.fast_path_count else 0.0
+            agent_latency = self.agent_time / self.agent_count if self.agent_count else 0.0
+            saved = self.fast_path_count * (agent_latency - fast_path_latency) if self.agent_count else 0.0
+            return {
+                "fast_path_messages": self.fast_path_count,
+                "fast_path_fraction": self.fast_path_count / total if total else 0.0,
+                "fast_path_latency": fast_path_latency,
+                "agent_latency": agent_latency,
+                "fast_path_latency_saved": saved,
+            }
@@ -36,6 +36,7 @@ class ResearchAssistantUI:
         with chat_container:
             unique_messages = self._get_unique_messages(self.session_state.messages)
             self.chat_display.display_messages(unique_messages)
+            self._stream_pending_question()
 
         with input_container:
             self.session_controls.render()
@@ -57,13 +58,22 @@ class ResearchAssistantUI:
                         args=(question,)
                     )
 
+    def _stream_pending_question(self):
+        # Widget callbacks run before the page is laid out, so the answer is streamed here instead
+        question = self.session_state.pending_question
+        if not question:
+            return
+        self.session_state.pending_question = None
+        st.write(f"**You:** {question}")
+        self.chat_display.stream_response(self.coordinator.stream_message(question, self.session_state))
+
     def _handle_user_input(self, user_input: str):
         self.session_state.show_predefined = False
-        self.coordinator.process_message(user_input, self.session_state)
+        self.session_state.pending_question = user_input
 
     def _handle_predefined_question(self, question: str):
         self.session_state.show_predefined = False
-        self.coordinator.process_message(question, self.session_state)
+        self.session_state.pending_question = question
 
     def _handle_session_end(self):
         self.coordinator.cleanup()
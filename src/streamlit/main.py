@@ -17,6 +17,8 @@ def main():
         st.session_state.show_predefined = True
     if "session_active" not in st.session_state:
         st.session_state.session_active = True
+    if "pending_question" not in st.session_state:
+        st.session_state.pending_question = None
 
     ui = ResearchAssistantUI(st.session_state.app, st.session_state)
     ui.render()
\ No newline at end of file
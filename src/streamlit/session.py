@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 @dataclass
 class SessionState:
@@ -8,3 +8,4 @@ class SessionState:
     conversation_history: List[str] = field(default_factory=list)
     show_predefined: bool = True
     session_active: bool = True
+    pending_question: Optional[str] = None
@@ -1,6 +1,7 @@
 import streamlit as st
-from typing import List, Callable
+from typing import Any, Callable, Iterable, List
 from langchain.schema import HumanMessage, AIMessage
+from src.agents.streaming import ANSWER_RESTART
 
 class ChatDisplay:
     @staticmethod
@@ -18,6 +19,21 @@ class ChatDisplay:
             st.write(formatted_message)
         st.markdown("<br>" * 2, unsafe_allow_html=True)
 
+    @staticmethod
+    def stream_response(tokens: Iterable[Any]) -> str:
+        """Render an assistant reply token by token and return the full text."""
+        placeholder = st.empty()
+        text = ""
+        for token in tokens:
+            if token is ANSWER_RESTART:
+                # The agent was re-prompted; only its last answer is kept
+                text = ""
+                continue
+            text += token
+            placeholder.markdown(f"**Assistant:** {text}▌")
+        placeholder.markdown(f"**Assistant:** {text}")
+        return text
+
 
 class InputArea:
     def __init__(self, on_submit: Callable[[str], None]):
@@ -2,6 +2,7 @@ from src.components.paper.tool import PaperTool
 from src.utils.paper_id_extractor import PaperIdExtractor
 from langchain.tools.base import BaseTool
 from pydantic import PrivateAttr
+from typing import Any, Dict, Optional
 import time
 import json
 
@@ -34,38 +35,63 @@ class PaperLookupTool(BaseTool):
         # Start timing
         start_time = time.time()
 
-        paper_id = None
-        response_text = ""
-        success = False
-        error_msg = None
-
+        paper_id = self._paper_id_extractor.extract(query)
+        if not paper_id:
+            return self._no_paper_id()
         try:
-            paper_id = self._paper_id_extractor.extract(query)
-            if not paper_id:
-                response_text = "No valid paper ID found in the message."
-                return json.dumps({
-                    "ground_truth": "",
-                    "tool_answer": response_text
-                })
-
             # Get paper info with metrics
             result = self._paper_service.find_paper_by_id(paper_id)
-            if result["success"]:
-                # The “official text” from the DB
-                ground_truth = result["response"]
-                success = True
-                tool_answer = (
-                    f"Here is the paper with ID {paper_id}:\n\n"
-                    f"{ground_truth}"
-                )
-            else:
-                ground_truth = ""
-                tool_answer = f"Paper with ID {paper_id} not found."
         except Exception as e:
+            return self._finish(query, paper_id, start_time, error=e)
+        return self._finish(query, paper_id, start_time, result=result)
+
+    async def _arun(self, query: str) -> str:
+        """Async paper lookup over the async Neo4j driver."""
+        start_time = time.time()
+
+        paper_id = self._paper_id_extractor.extract(query)
+        if not paper_id:
+            return self._no_paper_id()
+        try:
+            result = await self._paper_service.afind_paper_by_id(paper_id)
+        except Exception as e:
+            return self._finish(query, paper_id, start_time, error=e)
+        return self._finish(query, paper_id, start_time, result=result)
+
+    @staticmethod
+    def _no_paper_id() -> str:
+        return json.dumps({
+            "ground_truth": "",
+            "tool_answer": "No valid paper ID found in the message."
+        })
+
+    def _finish(
+            self,
+            query: str,
+            paper_id: str,
+            start_time: float,
+            result: Optional[Dict[str, Any]] = None,
+            error: Optional[Exception] = None
+    ) -> str:
+        response_text = ""
+        success = False
+        error_msg = None
+
+        if error is not None:
             ground_truth = ""
-            error_msg = str(e)
+            error_msg = str(error)
             tool_answer = f"Error looking up paper: {error_msg}"
-            success = False
+        elif result["success"]:
+            # The “official text” from the DB
+            ground_truth = result["response"]
+            success = True
+            tool_answer = (
+                f"Here is the paper with ID {paper_id}:\n\n"
+                f"{ground_truth}"
+            )
+        else:
+            ground_truth = ""
+            tool_answer = f"Paper with ID {paper_id} not found."
 
         # End timing
         end_time = time.time()
@@ -82,8 +108,7 @@ class PaperLookupTool(BaseTool):
         )
 
         # Log to CometML
-        if paper_id:
-            self._experiment_tracker.log_paper_lookup(paper_id, metrics_data)
+        self._experiment_tracker.log_paper_lookup(paper_id, metrics_data)
 
         return json.dumps({
             "ground_truth": ground_truth,
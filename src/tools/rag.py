@@ -1,13 +1,42 @@
 from langchain.tools import BaseTool
 from pydantic import PrivateAttr
+from typing import Any, Dict, Optional, Tuple
+import re
 import time
 
+from src.components.database.vector_store import SearchFilter
 from src.components.rag.tool import RAG
+from src.components.rag.prefetch import current_prefetch
 from src.components.evaluation.experiment_tracker import ExperimentTracker, MetricsCollector, MetricsData
 
+# `category:cs.LG`, `author:"Geoffrey Hinton"`, `from:2020-01-01`, `to:2021-12-31`
+FILTER_TOKEN = re.compile(r'\b(category|author|from|to):(?:"([^"]+)"|(\S+))', re.IGNORECASE)
+
+
+def split_filters(query: str) -> Tuple[str, SearchFilter]:
+    """Strip filter tokens out of a tool query and return the remaining question with its `SearchFilter`."""
+    search_filter = SearchFilter()
+    for match in FILTER_TOKEN.finditer(query):
+        key, value = match.group(1).lower(), match.group(2) or match.group(3)
+        if key == "category":
+            search_filter.categories.append(value)
+        elif key == "author":
+            search_filter.authors.append(value)
+        elif key == "from":
+            search_filter.submitted_from = value
+        else:
+            search_filter.submitted_to = value
+    question = " ".join(FILTER_TOKEN.sub(" ", query).split())
+    return question or query, search_filter
+
+
 class RAGTool(BaseTool):
     name: str = "RAG"
-    description: str = "Use this tool to retrieve research papers and generate answers to general queries."
+    description: str = (
+        "Use this tool to retrieve research papers and generate answers to general queries. "
+        "To restrict the search, add filters to the query: category:cs.LG, author:\"Full Name\", "
+        "from:YYYY-MM-DD and to:YYYY-MM-DD (submission date). Repeat category or author to allow several."
+    )
     _rag_service: RAG = PrivateAttr()
     _experiment_tracker: ExperimentTracker = PrivateAttr()
     _metrics_collector: MetricsCollector = PrivateAttr()
@@ -28,17 +57,56 @@ class RAGTool(BaseTool):
         # Start timing
         start_time = time.time()
 
-        response_text = ""
+        try:
+            question, search_filter = split_filters(query)
+            # Reuse context retrieved while the agent was planning, if it was for this (unfiltered) query
+            prefetch = self._prefetch(search_filter)
+            context = prefetch.take(question) if prefetch is not None else None
+            response = self._rag_service.answer_question(question, search_filter=search_filter, context=context)
+        except Exception as e:
+            return self._finish(query, start_time, error=e)
+        return self._finish(query, start_time, response=response)
+
+    async def _arun(self, query: str) -> str:
+        """Async RAG query, so concurrent tool calls share one event loop."""
+        start_time = time.time()
+
+        try:
+            question, search_filter = split_filters(query)
+            prefetch = self._prefetch(search_filter)
+            context = await prefetch.atake(question) if prefetch is not None else None
+            response = await self._rag_service.aanswer_question(question, search_filter=search_filter, context=context)
+        except Exception as e:
+            return self._finish(query, start_time, error=e)
+        return self._finish(query, start_time, response=response)
+
+    @staticmethod
+    def _prefetch(search_filter: SearchFilter):
+        prefetch = current_prefetch.get()
+        if prefetch is not None and not search_filter.is_empty():
+            # The prefetch searched without the filter, so its context does not apply
+            prefetch.cancel()
+            return None
+        return prefetch
+
+    def _finish(
+        self,
+        query: str,
+        start_time: float,
+        response: Optional[Dict[str, Any]] = None,
+        error: Optional[Exception] = None
+    ) -> str:
         success = False
         error_msg = None
+        rag_metrics = {}
 
-        try:
-            response = self._rag_service.answer_question(query)
+        if error is not None:
+            error_msg = str(error)
+            response_text = f"Error processing RAG query: {error_msg}"
+        else:
             response_text = response["response"]
+            rag_metrics = response["metrics"]
             success = True
-        except Exception as e:
-            error_msg = str(e)
-            response_text = f"Error processing RAG query: {error_msg}"
 
         # End timing
         end_time = time.time()
@@ -50,10 +118,15 @@ class RAGTool(BaseTool):
             query_length=len(query),
             response_length=len(response_text),
             success=success,
-            token_count=self._metrics_collector.count_tokens(response_text),
+            # Reuse the count from RAG.answer_question rather than tokenizing the response again
+            token_count=(rag_metrics["response_tokens"] if "response_tokens" in rag_metrics
+                         else self._metrics_collector.count_tokens(response_text)),
             error=error_msg
         )
 
         # Log to CometML
         self._experiment_tracker.log_rag_query(metrics_data)
+        self._experiment_tracker.log_retrieval_timings(rag_metrics)
+        if self._rag_service.answer_cache is not None:
+            self._experiment_tracker.log_answer_cache(rag_metrics, self._rag_service.answer_cache.stats())
         return response_text
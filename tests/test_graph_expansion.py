@@ -0,0 +1,80 @@
+import os
+import unittest
+
+from neo4j import GraphDatabase
+
+from src.components.database.vector_store import GRAPH_EXPANSION_BY_ID
+
+PREFIX = "test-graph-expansion-"
+CATEGORY_SIZE = 1200
+COLLABORATION_SIZE = 1500
+
+
+@unittest.skipUnless(os.getenv("NEO4J_TEST_URI"), "set NEO4J_TEST_URI to run against a disposable Neo4j")
+class GraphExpansionTest(unittest.TestCase):
+    """Run `GRAPH_EXPANSION` against a small graph with a category and an author above 1000 papers."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.driver = GraphDatabase.driver(
+            os.environ["NEO4J_TEST_URI"],
+            auth=(os.getenv("NEO4J_TEST_USERNAME", "neo4j"), os.getenv("NEO4J_TEST_PASSWORD", ""))
+        )
+        with cls.driver.session() as session:
+            session.run(
+                """
+                CREATE (hit:Paper {id: $prefix + 'hit', title: 'hit'})
+                CREATE (coauthored:Paper {id: $prefix + 'coauthored', title: 'coauthored'})
+                CREATE (author:Author {name: $prefix + 'author'})
+                CREATE (collaboration:Author {name: $prefix + 'collaboration'})
+                CREATE (category:Category {name: $prefix + 'category'})
+                CREATE (hit)-[:AUTHORED_BY]->(author), (coauthored)-[:AUTHORED_BY]->(author)
+                CREATE (hit)-[:AUTHORED_BY]->(collaboration), (hit)-[:BELONGS_TO]->(category)
+                WITH category, collaboration
+                UNWIND range(1, $category_size) AS i
+                CREATE (:Paper {id: $prefix + 'category-' + i, title: 'category'})-[:BELONGS_TO]->(category)
+                WITH DISTINCT collaboration
+                UNWIND range(1, $collaboration_size) AS i
+                CREATE (:Paper {id: $prefix + 'collaboration-' + i, title: 'collaboration'})
+                    -[:AUTHORED_BY]->(collaboration)
+                """,
+                prefix=PREFIX, category_size=CATEGORY_SIZE, collaboration_size=COLLABORATION_SIZE
+            )
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.driver.session() as session:
+            session.run(
+                """
+                MATCH (n)
+                WHERE (n:Paper AND n.id STARTS WITH $prefix) OR ((n:Author OR n:Category) AND n.name STARTS WITH $prefix)
+                DETACH DELETE n
+                """,
+                prefix=PREFIX
+            )
+        cls.driver.close()
+
+    def expand(self, expand: int, fanout: int = 100):
+        with self.driver.session() as session:
+            record = session.run(
+                GRAPH_EXPANSION_BY_ID,
+                hits=[{"id": PREFIX + "hit", "score": 1.0}], expand=expand, max_author_degree=1000, fanout=fanout
+            ).single()
+        return record["related"]
+
+    def test_large_category_contributes_related_papers(self):
+        related = self.expand(expand=10)
+        titles = [paper["title"] for paper in related]
+        # The shared small author outranks the shared 1200-paper category
+        self.assertEqual(titles[0], "coauthored")
+        self.assertIn("category", titles)
+        # The 1500-paper author is above max_author_degree and contributes nothing
+        self.assertNotIn("collaboration", titles)
+
+    def test_fanout_bounds_candidates_per_shared_node(self):
+        related = self.expand(expand=CATEGORY_SIZE, fanout=50)
+        self.assertEqual(sum(paper["title"] == "category" for paper in related), 50)
+
+
+if __name__ == "__main__":
+    unittest.main()